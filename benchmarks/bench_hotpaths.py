@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+from payloads import devices, observations  # noqa: E402
+
+from ambient_wx.ambient_wx import (  # noqa: E402
+    AmbientApi,
+    WxDeviceCollection,
+    WxObservation,
+    WxObservationCollection,
+)
+from ambient_wx.frame import WxObservationFrame  # noqa: E402
+from ambient_wx.parallel import ParsePool  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        payload = self.server.payloads["devices" if path.endswith("/devices") else "observations"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_stub_server(observation_payload, device_payload):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.payloads = {
+        "observations": json.dumps(observation_payload).encode(),
+        "devices": json.dumps(device_payload).encode(),
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def scenarios(args, api, tmpdir, parse_pool):
+    records = observations(args.rows, fields=args.fields)
+    device_payload = devices(args.stations, fields=args.fields)
+    frame = WxObservationFrame.from_records(records)
+    collection = WxObservationCollection(api, mac_addr="00:00:00:00:00:00")
+    device_collection = WxDeviceCollection(api)
+    csv_path = os.path.join(tmpdir, "observations.csv")
+    content = json.dumps(records).encode()
+
+    def observation_objects():
+        for record in records:
+            WxObservation(**record).tempf
+
+    def parse_response_data():
+        collection.raw_data = records
+        collection._WxObservationCollection__parse_response_data()
+
+    def parse_devices():
+        device_collection.raw_data = device_payload
+        device_collection._WxDeviceCollection__parse_response_data()
+
+    def parse_serial_pages():
+        for _ in range(args.pages):
+            WxObservationFrame.from_records(json.loads(content))
+
+    def parse_pool_pages():
+        futures = [parse_pool.submit(content) for _ in range(args.pages)]
+        for future in futures:
+            parse_pool.result(future)
+
+    def parse_projected():
+        WxObservationFrame.from_records(records, fields=["tempf", "humidity", "windspeedmph"])
+
+    return {
+        "WxObservation": observation_objects,
+        "parse_response_data": parse_response_data,
+        "parse_projected": parse_projected,
+        "parse_devices": parse_devices,
+        "to_dataframe": frame.to_dataframe,
+        "write_csv": lambda: frame.write_csv(csv_path),
+        "to_units_SI": lambda: frame.to_units("SI"),
+        "get_observations": lambda: collection.get_observations(limit=args.rows),
+        "get_observations_stream": lambda: collection.get_observations(
+            limit=args.rows, stream=True
+        ),
+        "get_devices": device_collection.get_devices,
+        "parse_serial_pages": parse_serial_pages,
+        "parse_pool_pages": parse_pool_pages,
+    }
+
+
+def measure(func, repeat):
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"min_ms": min(times) * 1000, "median_ms": statistics.median(times) * 1000, "peak": peak}
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("median_ms", "peak"):
+            if result[metric] > baseline[name][metric] * threshold:
+                regressions.append(
+                    f"{name} {metric}: {baseline[name][metric]:.1f} -> {result[metric]:.1f}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path timings and peak memory for ambient_wx")
+    parser.add_argument("--rows", type=int, default=288)
+    parser.add_argument("--stations", type=int, default=10)
+    parser.add_argument("--fields", choices=["basic", "extended"], default="extended")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--pages", type=int, default=8, help="pages per parse_pool_pages run")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--save", help="write results as json")
+    parser.add_argument("--baseline", help="compare against results written with --save")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        observations(args.rows, fields=args.fields), devices(args.stations, fields=args.fields)
+    )
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    api = AmbientApi("bench", "bench", base_url=base_url, rate_limit=False)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with ParsePool(processes=args.processes) as parse_pool:
+                for name, func in scenarios(args, api, tmpdir, parse_pool).items():
+                    if args.only and name not in args.only:
+                        continue
+                    results[name] = result = measure(func, args.repeat)
+                    print(
+                        f"{name:<25} min {result['min_ms']:9.2f} ms   "
+                        f"median {result['median_ms']:9.2f} ms   "
+                        f"peak {result['peak'] / 1024:10.1f} KiB"
+                    )
+    finally:
+        api.close()
+        server.shutdown()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+SCENARIOS = {
+    "import": "import ambient_wx",
+    "import+parse": (
+        "import ambient_wx\n"
+        "from ambient_wx.frame import WxObservationFrame\n"
+        "WxObservationFrame.from_records([{'dateutc': 1, 'date': '2018-01-08T18:35:00.000Z'}])"
+    ),
+    "import+units": "import ambient_wx\nfrom ambient_wx import units\nunits.get_registry()",
+    "import+pandas": (
+        "import ambient_wx\n"
+        "from ambient_wx.frame import WxObservationFrame\n"
+        "WxObservationFrame.from_records([{'dateutc': 1}]).to_dataframe()"
+    ),
+}
+
+TIMER = "import time\n_start = time.perf_counter()\n{code}\nprint(time.perf_counter() - _start)"
+
+
+def cold_start_times(code, runs):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    times = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import timings for ambient_wx")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    for name, code in SCENARIOS.items():
+        times = cold_start_times(code, args.runs)
+        print(
+            f"{name:<15} min {min(times) * 1000:8.1f} ms   "
+            f"median {statistics.median(times) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import random
+from datetime import datetime, timezone
+
+STEP = 300000
+LATEST = 1711929600000
+
+BASIC_FIELDS = {
+    "tempf": (10.0, 100.0),
+    "tempinf": (60.0, 80.0),
+    "feelsLike": (5.0, 105.0),
+    "dewPoint": (0.0, 70.0),
+    "humidity": (10, 100),
+    "humidityin": (20, 60),
+    "windspeedmph": (0.0, 30.0),
+    "windgustmph": (0.0, 45.0),
+    "maxdailygust": (0.0, 50.0),
+    "winddir": (0, 359),
+    "winddir_avg10m": (0, 359),
+    "baromrelin": (29.2, 30.6),
+    "baromabsin": (28.5, 30.0),
+    "hourlyrainin": (0.0, 0.5),
+    "dailyrainin": (0.0, 2.0),
+    "monthlyrainin": (0.0, 8.0),
+    "yearlyrainin": (0.0, 40.0),
+    "solarradiation": (0.0, 1000.0),
+    "uv": (0, 11),
+}
+
+EXTENDED_FIELDS = {
+    **BASIC_FIELDS,
+    **{f"temp{index}f": (10.0, 100.0) for index in range(1, 9)},
+    **{f"humidity{index}": (10, 100) for index in range(1, 9)},
+    **{f"soilhum{index}": (0, 100) for index in range(1, 5)},
+    **{f"batt{index}": (0, 1) for index in range(1, 9)},
+    "battout": (0, 1),
+    "batt_co2": (0, 1),
+    "pm25": (0.0, 80.0),
+    "pm25_24h": (0.0, 60.0),
+    "co2_in_aqin": (400, 2000),
+}
+
+FIELD_SETS = {"basic": BASIC_FIELDS, "extended": EXTENDED_FIELDS}
+
+
+def _value(rng, low, high):
+    if isinstance(low, int) and isinstance(high, int):
+        return rng.randint(low, high)
+    return round(rng.uniform(low, high), 2)
+
+
+def observation(dateutc, fields="basic", rng=None):
+    rng = rng or random.Random(dateutc)
+    record = {
+        "dateutc": dateutc,
+        "date": datetime.fromtimestamp(dateutc / 1000, tz=timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%S.000Z"
+        ),
+        "tz": "America/New_York",
+    }
+    for name, (low, high) in FIELD_SETS[fields].items():
+        record[name] = _value(rng, low, high)
+    return record
+
+
+def observations(rows, fields="basic", latest=LATEST, step=STEP, seed=0):
+    rng = random.Random(seed)
+    return [observation(latest - step * index, fields, rng) for index in range(rows)]
+
+
+def devices(stations, fields="basic", latest=LATEST, seed=0):
+    rng = random.Random(seed)
+    payload = []
+    for index in range(stations):
+        mac_addr = ":".join(f"{(index >> shift) & 0xFF:02X}" for shift in range(40, -8, -8))
+        payload.append(
+            {
+                "macAddress": mac_addr,
+                "info": {
+                    "name": f"Station {index}",
+                    "coords": {
+                        "location": "Somewhere",
+                        "address": f"{index} Main St",
+                        "elevation": round(rng.uniform(0, 2000), 1),
+                        "coords": {
+                            "lat": round(rng.uniform(-60, 60), 4),
+                            "lon": round(rng.uniform(-180, 180), 4),
+                        },
+                    },
+                },
+                "lastData": observation(latest, fields, rng),
+            }
+        )
+    return payload
@@ -1,3 +1,5 @@
+import importlib
+
 from ambient_wx._version import __version__
 from ambient_wx.ambient_wx import (
     AmbientApi,
@@ -5,3 +7,32 @@ from ambient_wx.ambient_wx import (
     WxDeviceCollection,
     WxObservationCollection,
 )
+from ambient_wx.api import ApiRequestError, ApiSession
+from ambient_wx.archive import WxArchive
+from ambient_wx.cache import ResponseCache, SQLiteCacheBackend
+from ambient_wx.daemon import WxSyncDaemon
+from ambient_wx.fleet import WxFleet
+from ambient_wx.frame import WxObservationFrame
+from ambient_wx.gaps import WxGapIndex
+from ambient_wx.instrumentation import MetricsAggregator
+from ambient_wx.ratelimit import RateLimiter
+from ambient_wx.rollup import WxRollup
+from ambient_wx.store import WxObservationStore
+
+_LAZY = {
+    "AsyncWxDeviceCollection": "ambient_wx.aio",
+    "AsyncWxObservationCollection": "ambient_wx.aio",
+    "WxRealtimeClient": "ambient_wx.realtime",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY})
@@ -0,0 +1,59 @@
+import asyncio
+import weakref
+
+from ambient_wx.ambient_wx import WxDeviceCollection, WxObservationCollection
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _semaphore(session):
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(session, weakref.WeakKeyDictionary())
+    if loop not in semaphores:
+        semaphores[loop] = asyncio.Semaphore(session.pool_maxsize)
+    return semaphores[loop]
+
+
+async def _run(session, func, *args, **kwargs):
+    async with _semaphore(session):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+class AsyncWxDeviceCollection(WxDeviceCollection):
+    def __repr__(self):
+        return f"AsyncWxDeviceCollection(ambient_api={self.ambient_api})"
+
+    async def get_devices(self):
+        await _run(self.session, super().get_devices)
+
+
+class AsyncWxObservationCollection(WxObservationCollection):
+    def __repr__(self):
+        return f"AsyncWxObservationCollection(ambient_api={self.ambient_api}, device={self.device})"
+
+    async def get_observations(self, **kwargs):
+        await _run(self.session, super().get_observations, **kwargs)
+
+    async def iter_observations(self, start, end=None, limit=288, parse_pool=None):
+        batches = super().iter_observations(start, end=end, limit=limit, parse_pool=parse_pool)
+        while True:
+            batch = await _run(self.session, next, batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    async def backfill(self, start, end=None, limit=288, sink=None, parse_pool=None):
+        await _run(
+            self.session,
+            super().backfill,
+            start,
+            end=end,
+            limit=limit,
+            sink=sink,
+            parse_pool=parse_pool,
+        )
+
+
+async def gather_observations(collections, **kwargs):
+    await asyncio.gather(*(collection.get_observations(**kwargs) for collection in collections))
+    return collections
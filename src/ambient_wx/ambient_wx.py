@@ -1,15 +1,35 @@
 import logging
-from datetime import datetime
+import os
+from collections import deque
+from datetime import datetime, timezone
 from types import SimpleNamespace
 
-import pandas as pd
-from pint import Quantity, UnitRegistry
+import numpy as np
 
-from ambient_wx.api import ApiRequestHandler
+from ambient_wx import instrumentation
+from ambient_wx.api import ApiRequestHandler, ApiSession
+from ambient_wx.archive import WxArchive
+from ambient_wx.frame import WxObservationFrame
+from ambient_wx.gaps import WxGapIndex
+from ambient_wx.jsonstream import get_loads, iter_json_array
+from ambient_wx.ratelimit import RateLimiter
+from ambient_wx.rollup import WxRollup
+from ambient_wx.units import FIELD_UNITS, LazyRegistryAttribute, QuantityField
 
 logging.getLogger("AmbientWx").addHandler(logging.NullHandler())
 
 
+def _parse_records(records, fields=None):
+    with instrumentation.timed("stage", stage="parse", rows=len(records)):
+        return WxObservationFrame.from_records(records, fields=fields)
+
+
+def _epoch_ms(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
 class AmbientApi:
     def __init__(
         self,
@@ -17,12 +37,20 @@ class AmbientApi:
         application_key,
         base_url="https://rt.ambientweather.net",
         version=1,
+        session=None,
+        rate_limit=True,
+        cache=None,
     ):
         self.api_key = api_key
         self.application_key = application_key
         self.base_url = base_url
         self.version = version
         self.api_url = f"{self.base_url}/v{self.version}"
+        self.session = session if session is not None else ApiSession()
+        self.cache = cache
+        self.rate_limiter = None
+        if rate_limit:
+            self.rate_limiter = RateLimiter.for_credentials(api_key, application_key)
 
     def __repr__(self):
         return (
@@ -30,46 +58,78 @@ class AmbientApi:
             "base_url={self.base_url})"
         )
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _handler_kwargs(self, kwargs):
+        if "retry_total" not in kwargs and "timeout" not in kwargs:
+            kwargs.setdefault("session", self.session)
+        kwargs.setdefault("rate_limiter", self.rate_limiter)
+        kwargs.setdefault("cache", self.cache)
+        return kwargs
+
 
 class WxObservation:
-    ureg = UnitRegistry()
-    Q_ = ureg.Quantity
+    __slots__ = ("dateutc", "_date", "_extras") + tuple(f"_{field}" for field in FIELD_UNITS)
+    ureg = LazyRegistryAttribute("ureg")
+    Q_ = LazyRegistryAttribute("Q_")
+    windspeedmph = QuantityField()
+    windgustmph = QuantityField()
+    maxdailygust = QuantityField()
+    tempf = QuantityField()
+    baromrelin = QuantityField()
+    baromabsin = QuantityField()
+    tempinf = QuantityField()
+    hourlyrainin = QuantityField()
+    dailyrainin = QuantityField()
+    monthlyrainin = QuantityField()
+    yearlyrainin = QuantityField()
+    feelsLike = QuantityField()
+    dewPoint = QuantityField()
+    winddir = QuantityField()
+    winddir_avg10m = QuantityField()
+    humidity = QuantityField()
+    humidityin = QuantityField()
 
     def __init__(self, dateutc, date, **kwargs):
         self.dateutc = dateutc
-        self.date = datetime.strptime(date, "%Y-%m-%dT%H:%M:%S.%fZ")
-        self.windspeedmph = self.__set_units(kwargs.pop("windspeedmph", None), self.ureg.mph)
-        self.windgustmph = self.__set_units(kwargs.pop("windgustmph", None), self.ureg.mph)
-        self.maxdailygust = self.__set_units(kwargs.pop("maxdailygust", None), self.ureg.mph)
-        self.tempf = self.__set_units(kwargs.pop("tempf", None), self.ureg.degF)
-        self.baromrelin = self.__set_units(kwargs.pop("baromrelin", None), self.ureg.Hg)
-        self.baromabsin = self.__set_units(kwargs.pop("baromabsin", None), self.ureg.Hg)
-        self.tempinf = self.__set_units(kwargs.pop("tempinf", None), self.ureg.degF)
-        self.hourlyrainin = self.__set_units(kwargs.pop("hourlyrainin", None), self.ureg.inches)
-        self.dailyrainin = self.__set_units(kwargs.pop("dailyrainin", None), self.ureg.inches)
-        self.monthlyrainin = self.__set_units(kwargs.pop("monthlyrainin", None), self.ureg.inches)
-        self.yearlyrainin = self.__set_units(kwargs.pop("yearlyrainin", None), self.ureg.inches)
-        self.feelsLike = self.__set_units(kwargs.pop("feelsLike", None), self.ureg.degF)
-        self.dewPoint = self.__set_units(kwargs.pop("dewPoint", None), self.ureg.degF)
-        self.winddir = self.__set_units(kwargs.pop("winddir", None), self.ureg.degrees)
-        self.winddir_avg10m = self.__set_units(
-            kwargs.pop("winddir_avg10m", None), self.ureg.degrees
-        )
-        self.humidity = self.__set_units(kwargs.pop("humidity", None), self.ureg.percent)
-        self.humidityin = self.__set_units(kwargs.pop("humidityin", None), self.ureg.percent)
-        for attr in kwargs.keys():
-            self.__dict__[attr] = kwargs[attr]
+        self._date = date
+        for field in FIELD_UNITS:
+            setattr(self, f"_{field}", kwargs.pop(field, None))
+        self._extras = kwargs
 
-    def __set_units(self, value, unit):
-        if value:
-            return self.Q_(value, unit)
-        return None
+    def __getattr__(self, name):
+        if name == "_extras":
+            raise AttributeError(name)
+        try:
+            return self._extras[name]
+        except KeyError:
+            raise AttributeError(name) from None
 
     def __repr__(self):
         return f"WxObservation(dateutc={self.dateutc}, date={self.date})"
 
+    @property
+    def date(self):
+        if isinstance(self._date, str):
+            self._date = datetime.strptime(self._date, "%Y-%m-%dT%H:%M:%S.%fZ")
+        return self._date
+
+    @date.setter
+    def date(self, value):
+        self._date = value
+
     def set_units(self, field, units):
-        self.__dict__[field] = self.Q_(self.__dict__[field], units)
+        if field in FIELD_UNITS:
+            setattr(self, field, self.Q_(getattr(self, f"_{field}"), units))
+        else:
+            self._extras[field] = self.Q_(self._extras[field], units)
 
 
 class WxDevice:
@@ -102,7 +162,7 @@ class WxDevice:
 
 class WxDeviceCollection(ApiRequestHandler):
     def __init__(self, ambient_api, **kwargs):
-        super().__init__(ambient_api.api_url, **kwargs)
+        super().__init__(ambient_api.api_url, **ambient_api._handler_kwargs(kwargs))
         self.ambient_api = ambient_api
 
     def __repr__(self):
@@ -141,13 +201,18 @@ class WxDeviceCollection(ApiRequestHandler):
         params["apiKey"] = self.ambient_api.api_key
         endpoint = "devices"
         response = self.get(endpoint=endpoint, params=params)
-        self.raw_data = response.json()
-        self.__parse_response_data()
+        with instrumentation.timed("stage", stage="decode") as stage:
+            self.raw_data = response.json()
+            stage["rows"] = len(self.raw_data)
+        with instrumentation.timed("stage", stage="parse_devices", rows=len(self.raw_data)):
+            self.__parse_response_data()
 
 
 class WxObservationCollection(ApiRequestHandler):
+    stream_chunk_size = 65536
+
     def __init__(self, ambient_api, device=None, mac_addr=None, **kwargs):
-        super().__init__(ambient_api.api_url, **kwargs)
+        super().__init__(ambient_api.api_url, **ambient_api._handler_kwargs(kwargs))
         self.ambient_api = ambient_api
         if device is not None:
             self.device = device
@@ -158,45 +223,245 @@ class WxObservationCollection(ApiRequestHandler):
     def __repr__(self):
         return f"WxObservationCollection(ambient_api={self.ambient_api}, device={self.device})"
 
-    def __parse_response_data(self):
-        self.data = [WxObservation(**record) for record in self.raw_data]
+    def __parse_response_data(self, fields=None):
+        self.data = _parse_records(self.raw_data, fields=fields)
 
-    def get_observations(self, **kwargs):
+    def __page_request(self, limit, end_date):
         params = {}
         params["applicationKey"] = self.ambient_api.application_key
         params["apiKey"] = self.ambient_api.api_key
-        params["limit"] = kwargs.get("limit", 288)
-        end_date = kwargs.get("end_date")
+        params["limit"] = limit
         if end_date:
             params["endDate"] = end_date.isoformat()
-        endpoint = f"devices/{self.device.mac_addr}"
+        return f"devices/{self.device.mac_addr}", params
+
+    def __get_page(self, limit=288, end_date=None, json_backend=None):
+        endpoint, params = self.__page_request(limit, end_date)
         response = self.get(endpoint=endpoint, params=params)
-        self.raw_data = response.json()
-        self.__parse_response_data()
+        with instrumentation.timed("stage", stage="decode") as stage:
+            if json_backend is None:
+                records = response.json()
+            else:
+                records = get_loads(json_backend)(response.content)
+            stage["rows"] = len(records)
+        return records
+
+    def __stream_page(self, limit, end_date, batch_size, keep_raw, fields=None):
+        endpoint, params = self.__page_request(limit, end_date)
+        raw_data = [] if keep_raw else None
+        batches = []
+        with self.get(endpoint=endpoint, params=params, stream=True) as response:
+            chunks = response.iter_content(chunk_size=self.stream_chunk_size)
+            for records in iter_json_array(chunks, batch_size=batch_size):
+                batches.append(_parse_records(records, fields=fields))
+                if keep_raw:
+                    raw_data.extend(records)
+        self.raw_data = raw_data
+        self.data = WxObservationFrame.concat(batches)
 
-    def to_dataframe(self):
+    def get_observations(self, **kwargs):
+        limit = kwargs.get("limit", 288)
+        end_date = kwargs.get("end_date")
+        fields = kwargs.get("fields")
+        if kwargs.get("stream", False):
+            batch_size = kwargs.get("batch_size", 1000)
+            keep_raw = kwargs.get("keep_raw", False)
+            self.__stream_page(limit, end_date, batch_size, keep_raw, fields=fields)
+            return
+        self.raw_data = self.__get_page(limit, end_date, kwargs.get("json_backend"))
+        self.__parse_response_data(fields=fields)
+        if not kwargs.get("keep_raw", True):
+            self.raw_data = None
+
+    def __iter_pages(self, start, end, limit):
+        start_ms = _epoch_ms(start)
+        end_date = end
+        seen = set()
+        while True:
+            records = self.__get_page(limit, end_date)
+            batch = [
+                record
+                for record in records
+                if record["dateutc"] >= start_ms and record["dateutc"] not in seen
+            ]
+            if not batch:
+                break
+            yield _parse_records(batch)
+            seen = {record["dateutc"] for record in records}
+            oldest = min(seen)
+            if oldest <= start_ms:
+                break
+            end_date = datetime.fromtimestamp(oldest / 1000, tz=timezone.utc)
+
+    def __iter_pages_parallel(self, start, end, limit, parse_pool):
+        from ambient_wx.parallel import oldest_dateutc
+
+        start_ms = _epoch_ms(start)
+        end_date = end
+        before_ms = None
+        pending = deque()
         try:
-            common_fields = []
-            for observation in self.data:
-                common_fields.extend(observation.__dict__.keys())
-            common_fields = list(set(common_fields))
-            data = {}
-            for observation in self.data:
-                obs_data = observation.__dict__
-                for field in common_fields:
-                    value = None
-                    if field in obs_data:
-                        value = obs_data[field]
-                    if isinstance(value, Quantity):
-                        value = value.magnitude
-                    if field not in data:
-                        data[field] = [value]
-                    else:
-                        data[field].append(value)
-            return pd.DataFrame(data)
-        except AttributeError:
+            while True:
+                endpoint, params = self.__page_request(limit, end_date)
+                content = self.get(endpoint=endpoint, params=params).content
+                pending.append(parse_pool.submit(content, start_ms, before_ms))
+                oldest = oldest_dateutc(content)
+                if oldest is None or oldest <= start_ms:
+                    break
+                if before_ms is not None and oldest >= before_ms:
+                    break
+                before_ms = oldest
+                end_date = datetime.fromtimestamp(oldest / 1000, tz=timezone.utc)
+                while pending and pending[0].done():
+                    batch = parse_pool.result(pending.popleft())
+                    if len(batch):
+                        yield batch
+            while pending:
+                batch = parse_pool.result(pending.popleft())
+                if len(batch):
+                    yield batch
+        finally:
+            while pending:
+                parse_pool.discard(pending.popleft())
+
+    def iter_observations(self, start, end=None, limit=288, parse_pool=None):
+        if parse_pool is not None:
+            return self.__iter_pages_parallel(start, end, limit, parse_pool)
+        return self.__iter_pages(start, end, limit)
+
+    def backfill(self, start, end=None, limit=288, sink=None, parse_pool=None):
+        batches = []
+        if parse_pool is not None:
+            pages = self.__iter_pages_parallel(start, end, limit, parse_pool)
+        else:
+            pages = self.__iter_pages(start, end, limit)
+        for batch in pages:
+            if sink is None:
+                batches.append(batch)
+            else:
+                sink(batch)
+        if sink is None:
+            self.data = WxObservationFrame.concat(batches)
+
+    def sync(self, store, start=None, limit=288):
+        mac_addr = self.device.mac_addr
+        latest = store.latest(mac_addr, count=2)
+        if latest:
+            start = datetime.fromtimestamp((latest[0] + 1) / 1000, tz=timezone.utc)
+            if len(latest) == 2:
+                cadence = max(latest[0] - latest[1], 1)
+                expected = (_epoch_ms(datetime.now(timezone.utc)) - latest[0]) // cadence + 1
+                limit = max(1, min(limit, expected))
+        if start is None:
+            batches = [_parse_records(self.__get_page(limit))]
+        else:
+            batches = self.__iter_pages(start, None, limit)
+        return sum(store.write(mac_addr, batch) for batch in batches)
+
+    def find_gaps(self, cadence=None, tolerance=1.5):
+        return WxGapIndex.from_frame(self.data, cadence=cadence, tolerance=tolerance)
+
+    def __fill_gap(self, gaps, end_ms, rows, start_ms, limit):
+        while True:
+            end_date = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)
+            records = self.__get_page(rows, end_date)
+            dateutc = np.array([record["dateutc"] for record in records], dtype=np.int64)
+            inside = gaps.contains(dateutc) & (dateutc < end_ms)
+            if inside.any():
+                yield _parse_records([record for record, keep in zip(records, inside) if keep])
+            if not len(dateutc) or dateutc.min() <= start_ms or dateutc.min() >= end_ms:
+                return
+            end_ms = int(dateutc.min())
+            rows = min(limit, (end_ms - start_ms) // gaps.cadence + 1)
+
+    def repair(self, gaps=None, limit=288, sink=None):
+        if gaps is None:
+            gaps = self.find_gaps()
+        batches = []
+        filled = 0
+        for end_ms, rows, start_ms in gaps.plan(limit):
+            for batch in self.__fill_gap(gaps, end_ms, rows, start_ms, limit):
+                filled += len(batch)
+                if sink is None:
+                    batches.append(batch)
+                else:
+                    sink(batch)
+        if batches:
+            if self.data is not None:
+                batches.insert(0, self.data)
+            frame = WxObservationFrame.concat(batches)
+            _, first = np.unique(-frame.columns["dateutc"], return_index=True)
+            self.data = frame[first]
+        return filled
+
+    def load(self, store, start=None, end=None):
+        start_ms = _epoch_ms(start) if start is not None else None
+        end_ms = _epoch_ms(end) if end is not None else None
+        self.data = store.read(self.device.mac_addr, start_ms, end_ms)
+
+    def to_arrow(self):
+        from ambient_wx.parquet import to_arrow
+
+        return to_arrow(self.data, mac_addr=self.device.mac_addr)
+
+    def write_parquet(self, root):
+        from ambient_wx.parquet import write_parquet
+
+        write_parquet(self.data, root, self.device.mac_addr)
+
+    def load_parquet(self, root, start=None, end=None, columns=None):
+        from ambient_wx.parquet import read_parquet
+
+        start_ms = _epoch_ms(start) if start is not None else None
+        end_ms = _epoch_ms(end) if end is not None else None
+        self.data = read_parquet(root, self.device.mac_addr, start_ms, end_ms, columns=columns)
+
+    def write_archive(self, path):
+        return WxArchive.write(path, self.data)
+
+    def load_archive(self, path, start=None, end=None, fields=None):
+        start_ms = _epoch_ms(start) if start is not None else None
+        end_ms = _epoch_ms(end) if end is not None else None
+        self.data = WxArchive(path).slice(start_ms, end_ms, fields=fields)
+
+    def rollup(self, freq="hour", path=None):
+        if path is not None and os.path.exists(path):
+            rollup = WxRollup.load(path)
+            if rollup.freq != freq:
+                raise ValueError(f"Rollup state at {path} is {rollup.freq}, not {freq}")
+        else:
+            rollup = WxRollup(freq)
+        rollup.update(self.data)
+        if path is not None:
+            rollup.save(path)
+        return rollup
+
+    def to_units(self, conversions):
+        with instrumentation.timed("stage", stage="to_units", rows=len(self.data)):
+            self.data = self.data.to_units(conversions)
+
+    def to_system(self, system):
+        self.to_units(system)
+
+    def to_dataframe(self, index=None, units=None, derived=None, fields=None):
+        if self.data is None:
+            import pandas as pd
+
             return pd.DataFrame()
+        with instrumentation.timed("stage", stage="to_dataframe", rows=len(self.data)):
+            return self.data.to_dataframe(
+                index=index,
+                units=units,
+                derived=derived,
+                elevation=self.device.elevation,
+                fields=fields,
+            )
+
+    def write_csv(self, filepath, chunksize=50000, index=None, fields=None):
+        if self.data is None:
+            import pandas as pd
 
-    def write_csv(self, filepath):
-        df = self.to_dataframe()
-        df.to_csv(filepath, index=False)
+            pd.DataFrame().to_csv(filepath, index=False)
+        else:
+            with instrumentation.timed("stage", stage="write_csv", rows=len(self.data)):
+                self.data.write_csv(filepath, chunksize=chunksize, index=index, fields=fields)
@@ -1,8 +1,17 @@
 import logging
+import threading
+import time
 
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
+from ambient_wx import instrumentation
+from ambient_wx.cache import cache_key
+
+
+class ApiRequestError(SystemExit):
+    pass
+
 
 class TimeoutHTTPAdapter(HTTPAdapter):
     default_timeout = (1, 10)
@@ -25,11 +34,91 @@ class LogRetry(Retry):
             last_status = kwargs["history"][-1].status
             message = f"Retry {retry_number}: status code {last_status}"
             logging.info(message)
+            instrumentation.emit("retry", status_code=last_status, retry_number=retry_number)
         super().__init__(*args, **kwargs)
 
 
-class ApiRequestHandler:
+class ApiSession:
     retry_status_codes = [429, 500, 502, 503, 504]
+    headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+
+    def __init__(
+        self,
+        retry_total=10,
+        backoff_factor=0.1,
+        timeout=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+    ):
+        self.retry_total = retry_total
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.__session = None
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"ApiSession(retry_total={self.retry_total}, pool_maxsize={self.pool_maxsize}, "
+            f"timeout={self.timeout})"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __build_session(self):
+        session = requests.Session()
+        session.headers.update(self.headers)
+        retries = LogRetry(
+            total=self.retry_total,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_status_codes,
+        )
+        adapter = TimeoutHTTPAdapter(
+            max_retries=retries,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        if self.timeout is not None:
+            adapter.timeout = self.timeout
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self):
+        if self.__session is None:
+            with self.__lock:
+                if self.__session is None:
+                    self.__session = self.__build_session()
+        return self.__session
+
+    @property
+    def closed(self):
+        return self.__session is None
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        with self.__lock:
+            if self.__session is not None:
+                self.__session.close()
+                self.__session = None
+
+
+class ApiRequestHandler:
+    retry_status_codes = ApiSession.retry_status_codes
     backoff_factor = 0.1
 
     def __init__(self, root_url, **kwargs):
@@ -38,18 +127,29 @@ class ApiRequestHandler:
         self.root_url = root_url
         self.retry_total = kwargs.get("retry_total", 10)
         self.timeout = kwargs.get("timeout")
+        self.rate_limiter = kwargs.get("rate_limiter")
+        self.cache = kwargs.get("cache")
+        self.session = kwargs.get("session")
+        self.__owns_session = self.session is None
+        if self.__owns_session:
+            self.session = ApiSession(
+                retry_total=self.retry_total,
+                backoff_factor=self.backoff_factor,
+                timeout=self.timeout,
+            )
 
     def __repr__(self):
         return f"ApiRequestHandler({self.root_url})"
 
-    def __get_session_with_retries(self):
-        self.__session = requests.Session()
-        retries = LogRetry(
-            total=self.retry_total,
-            backoff_factor=self.backoff_factor,
-            status_forcelist=self.retry_status_codes,
-        )
-        self.__session.mount(self.root_url, TimeoutHTTPAdapter(max_retries=retries))
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.__owns_session:
+            self.session.close()
 
     def __build_url(self, endpoint):
         if endpoint is not None:
@@ -59,15 +159,47 @@ class ApiRequestHandler:
 
     def __message_handling(self, msg):
         logging.error(msg)
-        raise SystemExit(msg)
+        raise ApiRequestError(msg)
+
+    def __emit_request(self, endpoint, response, start, stream):
+        status_code = None
+        size = None
+        retries = 0
+        if response is not None:
+            status_code = response.status_code
+            if stream:
+                size = int(response.headers.get("Content-Length", 0)) or None
+            else:
+                size = len(response.content)
+            history = getattr(getattr(response.raw, "retries", None), "history", None)
+            retries = len(history) if history else 0
+        instrumentation.emit(
+            "request",
+            endpoint=endpoint,
+            status_code=status_code,
+            duration=time.perf_counter() - start,
+            bytes=size,
+            retries=retries,
+        )
+
+    def get(self, endpoint=None, params=None, stream=False):
+        if self.cache is not None and not stream:
+            url = f"{self.root_url}/{endpoint}" if endpoint is not None else self.root_url
+            return self.cache.get(
+                cache_key(url, params), lambda: self.__request(endpoint, params, stream)
+            )
+        return self.__request(endpoint, params, stream)
 
-    def get(self, endpoint=None, params=None):
-        self.__get_session_with_retries()
+    def __request(self, endpoint, params, stream):
         self.__build_url(endpoint)
         error_message = None
+        response = None
+        start = time.perf_counter()
         try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
             logging.info(f"GET request: {self.url}")
-            response = self.__session.get(self.url, params=params, verify=True)
+            response = self.session.get(self.url, params=params, verify=True, stream=stream)
             response.raise_for_status()
         except requests.exceptions.RetryError:
             error_message = "API GET request retries exhausted"
@@ -86,8 +218,9 @@ class ApiRequestHandler:
         except requests.exceptions.RequestException as e:
             error_message = f"Request error {e.response.status_code}"
         finally:
+            if instrumentation.enabled():
+                self.__emit_request(endpoint, response, start, stream)
             if error_message is not None:
                 self.__message_handling(error_message)
 
-        self.__session.close()
         return response
@@ -0,0 +1,119 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from ambient_wx.frame import KEY_FIELDS, WxObservationFrame
+
+
+def _archive_dtype(name, column):
+    if name == "dateutc":
+        return np.dtype(np.int64)
+    if column.dtype.kind == "M":
+        return np.dtype("datetime64[ms]")
+    return np.dtype(np.float64)
+
+
+def _missing(dtype, size):
+    if dtype.kind == "M":
+        return np.full(size, np.datetime64("NaT"), dtype=dtype)
+    return np.full(size, np.nan, dtype=dtype)
+
+
+class WxArchive:
+    meta_file = "meta.json"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / self.meta_file) as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.units = meta["units"]
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in meta["columns"].items()}
+        self.columns = {
+            name: self.__open_column(name, dtype) for name, dtype in self.dtypes.items()
+        }
+
+    def __repr__(self):
+        return f"WxArchive({self.path}, rows={self.rows})"
+
+    def __len__(self):
+        return self.rows
+
+    def __open_column(self, name, dtype):
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / f"{name}.bin", dtype=dtype, mode="r", shape=(self.rows,))
+
+    @classmethod
+    def __write_meta(cls, path, rows, dtypes, units):
+        meta = {
+            "version": 1,
+            "rows": rows,
+            "columns": {name: dtype.str for name, dtype in dtypes.items()},
+            "units": units,
+        }
+        tmp_path = path / f"{cls.meta_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path / cls.meta_file)
+
+    @classmethod
+    def write(cls, path, frame):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if not len(frame) and (path / cls.meta_file).exists():
+            return cls(path)
+        dtypes = {
+            name: _archive_dtype(name, column)
+            for name, column in frame.columns.items()
+            if column.dtype.kind in "iufM"
+        }
+        order = np.argsort(frame.columns["dateutc"], kind="stable")
+        new = {name: frame.columns[name][order].astype(dtype) for name, dtype in dtypes.items()}
+        units = {name: unit for name, unit in frame.units.items() if name in dtypes}
+        if not (path / cls.meta_file).exists():
+            return cls.__rewrite(path, new, dtypes, units)
+        archive = cls(path)
+        units = {**archive.units, **units}
+        last = archive.columns["dateutc"][-1] if archive.rows else None
+        if set(dtypes) <= set(archive.dtypes) and (last is None or new["dateutc"][0] > last):
+            size = len(order)
+            for name, dtype in archive.dtypes.items():
+                column = new[name] if name in new else _missing(dtype, size)
+                with open(path / f"{name}.bin", "ab") as f:
+                    f.truncate(archive.rows * dtype.itemsize)
+                    f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+            cls.__write_meta(path, archive.rows + size, archive.dtypes, units)
+            return cls(path)
+        dtypes = {**archive.dtypes, **dtypes}
+        merged = {}
+        for name, dtype in dtypes.items():
+            old = archive.columns.get(name)
+            old = np.array(old) if old is not None else _missing(dtype, archive.rows)
+            column = new[name] if name in new else _missing(dtype, len(order))
+            merged[name] = np.concatenate([column, old])
+        _, first = np.unique(merged["dateutc"], return_index=True)
+        merged = {name: column[first] for name, column in merged.items()}
+        del archive
+        return cls.__rewrite(path, merged, dtypes, units)
+
+    @classmethod
+    def __rewrite(cls, path, columns, dtypes, units):
+        rows = len(columns["dateutc"])
+        for name, dtype in dtypes.items():
+            tmp_path = path / f"{name}.bin.tmp"
+            np.ascontiguousarray(columns[name], dtype=dtype).tofile(tmp_path)
+            os.replace(tmp_path, path / f"{name}.bin")
+        cls.__write_meta(path, rows, dtypes, units)
+        return cls(path)
+
+    def slice(self, start_ms=None, end_ms=None, fields=None):
+        dateutc = self.columns["dateutc"]
+        lo = 0 if start_ms is None else int(np.searchsorted(dateutc, start_ms, side="left"))
+        hi = self.rows if end_ms is None else int(np.searchsorted(dateutc, end_ms, side="left"))
+        names = self.columns if fields is None else dict.fromkeys([*KEY_FIELDS, *fields])
+        columns = {name: self.columns[name][lo:hi] for name in names if name in self.columns}
+        units = {name: unit for name, unit in self.units.items() if name in columns}
+        return WxObservationFrame(columns, units)
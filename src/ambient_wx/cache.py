@@ -0,0 +1,188 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from ambient_wx import instrumentation
+
+
+def cache_key(url, params=None):
+    items = sorted((params or {}).items())
+    return hashlib.sha256(json.dumps([url, items], default=str).encode()).hexdigest()
+
+
+def strip_query(url):
+    if not url:
+        return url
+    return urlunsplit(urlsplit(url)._replace(query="", fragment=""))
+
+
+def to_entry(response):
+    url = strip_query(response.url)
+    return (response.status_code, dict(response.headers), response.content, url)
+
+
+def from_entry(entry):
+    status_code, headers, content, url = entry
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+class _Flight:
+    __slots__ = ("done", "entry", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+class SQLiteCacheBackend:
+    def __init__(self, path):
+        self.path = path
+        self.__connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "expires REAL NOT NULL, "
+                "status_code INTEGER NOT NULL, "
+                "headers TEXT NOT NULL, "
+                "content BLOB NOT NULL, "
+                "url TEXT"
+                ") WITHOUT ROWID"
+            )
+
+    def __repr__(self):
+        return f"SQLiteCacheBackend({self.path})"
+
+    def get(self, key):
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT expires, status_code, headers, content, url FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        remaining = row[0] - time.time()
+        if remaining <= 0:
+            return None
+        return (row[1], json.loads(row[2]), row[3], row[4]), remaining
+
+    def set(self, key, entry, ttl):
+        status_code, headers, content, url = entry
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, time.time() + ttl, status_code, json.dumps(headers), content, url),
+            )
+            self.__connection.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+
+    def clear(self):
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM responses")
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+class ResponseCache:
+    def __init__(self, ttl=60, maxsize=256, backend=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.backend = backend
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__flights = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ResponseCache(ttl={self.ttl}, maxsize={self.maxsize}, size={len(self)})"
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __lookup(self, key):
+        with self.__lock:
+            item = self.__entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires <= self.clock():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return entry
+
+    def __store(self, key, entry, ttl=None):
+        with self.__lock:
+            self.__entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), entry)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def __hit(self, hit):
+        with self.__lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        instrumentation.emit("cache", hit=hit)
+
+    def get(self, key, fetch):
+        entry = self.__lookup(key)
+        if entry is not None:
+            self.__hit(True)
+            return from_entry(entry)
+        with self.__lock:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.__hit(True)
+            return from_entry(flight.entry)
+        try:
+            shared = self.backend.get(key) if self.backend is not None else None
+            self.__hit(shared is not None)
+            if shared is None:
+                entry = to_entry(fetch())
+                if self.backend is not None:
+                    self.backend.set(key, entry, self.ttl)
+                self.__store(key, entry)
+            else:
+                entry, remaining = shared
+                self.__store(key, entry, ttl=min(self.ttl, remaining))
+            flight.entry = entry
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__flights[key]
+            flight.done.set()
+        return from_entry(entry)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
@@ -0,0 +1,60 @@
+import argparse
+import logging
+import os
+
+from ambient_wx.ambient_wx import AmbientApi
+from ambient_wx.daemon import SINKS, WxSyncDaemon, make_sink
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ambient-wx")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="keep a local sink current for each device")
+    sync.add_argument("--sink", choices=list(SINKS), default="sqlite")
+    sync.add_argument("--path", required=True, help="sqlite database file or csv/parquet dir")
+    sync.add_argument("--mac", action="append", dest="mac_addrs", help="device mac address")
+    sync.add_argument("--api-key", default=os.environ.get("AMBIENT_API_KEY"))
+    sync.add_argument("--application-key", default=os.environ.get("AMBIENT_APPLICATION_KEY"))
+    sync.add_argument("--base-url", default="https://rt.ambientweather.net")
+    sync.add_argument("--workers", type=int, default=8)
+    sync.add_argument("--default-cadence", type=float, default=300, help="seconds")
+    sync.add_argument("--margin", type=float, default=30, help="seconds after expected report")
+    sync.add_argument("--max-backoff", type=float, default=3600, help="seconds")
+    sync.add_argument("--limit", type=int, default=288)
+    sync.add_argument("--once", action="store_true", help="sync every device once and exit")
+    sync.add_argument("--log-level", default="INFO")
+    return parser
+
+
+def sync(args):
+    if not args.api_key or not args.application_key:
+        raise SystemExit(
+            "API key and application key are required, pass --api-key and --application-key "
+            "or set AMBIENT_API_KEY and AMBIENT_APPLICATION_KEY"
+        )
+    with AmbientApi(args.api_key, args.application_key, base_url=args.base_url) as api:
+        daemon = WxSyncDaemon(
+            api,
+            make_sink(args.sink, args.path),
+            mac_addrs=args.mac_addrs,
+            max_workers=args.workers,
+            default_cadence=args.default_cadence,
+            margin=args.margin,
+            max_backoff=args.max_backoff,
+            limit=args.limit,
+        )
+        daemon.run(once=args.once)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        format="%(levelname)s: %(asctime)s - %(message)s", level=args.log_level.upper()
+    )
+    if args.command == "sync":
+        return sync(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
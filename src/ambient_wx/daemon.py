@@ -0,0 +1,256 @@
+import csv
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from ambient_wx.ambient_wx import WxDevice, WxDeviceCollection, WxObservationCollection
+from ambient_wx.api import ApiRequestError
+from ambient_wx.store import WxObservationStore
+
+
+def _tail_lines(path, count, block=65536):
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            position = max(0, position - block)
+            f.seek(position)
+            data = f.read(end - position)
+    return data.decode().splitlines()[1:][-count:]
+
+
+class CsvSink:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.__latest = {}
+        self.__headers = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"CsvSink({self.root})"
+
+    def __path(self, mac_addr):
+        return self.root / f"{mac_addr.replace(':', '')}.csv"
+
+    def __load(self, mac_addr):
+        path = self.__path(mac_addr)
+        if not path.exists() or not path.stat().st_size:
+            self.__latest[mac_addr] = []
+            return
+        with open(path, newline="") as f:
+            header = next(csv.reader(f))
+        self.__headers[mac_addr] = header
+        column = header.index("dateutc")
+        rows = csv.reader(_tail_lines(path, 2))
+        self.__latest[mac_addr] = sorted((int(row[column]) for row in rows), reverse=True)
+
+    def __widen(self, mac_addr, added):
+        import pandas as pd
+
+        path = self.__path(mac_addr)
+        header = self.__headers[mac_addr] = [*self.__headers[mac_addr], *added]
+        logging.info(f"Adding columns {added} to {path}")
+        df = pd.read_csv(path, dtype=str, keep_default_na=False).reindex(columns=header)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return header
+
+    def latest(self, mac_addr, count=1):
+        with self.__lock:
+            if mac_addr not in self.__latest:
+                self.__load(mac_addr)
+            return self.__latest[mac_addr][:count]
+
+    def write(self, mac_addr, frame):
+        if not len(frame):
+            return 0
+        with self.__lock:
+            if mac_addr not in self.__latest:
+                self.__load(mac_addr)
+            frame = frame[np.argsort(frame.columns["dateutc"], kind="stable")]
+            header = self.__headers.setdefault(mac_addr, frame.fields)
+            added = [field for field in frame.fields if field not in header]
+            if added:
+                header = self.__widen(mac_addr, added)
+            df = frame.to_dataframe().reindex(columns=header)
+            path = self.__path(mac_addr)
+            df.to_csv(path, mode="a", header=not path.exists(), index=False)
+            newest = sorted(frame.columns["dateutc"].tolist(), reverse=True)
+            self.__latest[mac_addr] = sorted({*newest[:2], *self.__latest[mac_addr]})[::-1][:2]
+        return len(frame)
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.__latest = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ParquetSink({self.root})"
+
+    def latest(self, mac_addr, count=1):
+        from ambient_wx.parquet import read_parquet
+
+        with self.__lock:
+            if mac_addr not in self.__latest:
+                latest = []
+                if self.root.exists():
+                    frame = read_parquet(self.root, mac_addr, columns=["dateutc"])
+                    latest = frame.columns["dateutc"][:2].tolist() if len(frame) else []
+                self.__latest[mac_addr] = latest
+            return self.__latest[mac_addr][:count]
+
+    def write(self, mac_addr, frame):
+        from ambient_wx.parquet import write_parquet
+
+        if not len(frame):
+            return 0
+        self.latest(mac_addr)
+        with self.__lock:
+            write_parquet(frame, self.root, mac_addr)
+            newest = sorted(frame.columns["dateutc"].tolist(), reverse=True)
+            self.__latest[mac_addr] = sorted({*newest[:2], *self.__latest[mac_addr]})[::-1][:2]
+        return len(frame)
+
+    def close(self):
+        pass
+
+
+SINKS = {"sqlite": WxObservationStore, "csv": CsvSink, "parquet": ParquetSink}
+
+
+def make_sink(kind, path):
+    try:
+        return SINKS[kind](path)
+    except KeyError:
+        raise ValueError(f"Unknown sink {kind}, use one of {list(SINKS)}") from None
+
+
+class WxSyncDaemon:
+    def __init__(
+        self,
+        ambient_api,
+        sink,
+        mac_addrs=None,
+        max_workers=8,
+        default_cadence=300,
+        margin=30,
+        max_backoff=3600,
+        limit=288,
+        clock=time.time,
+    ):
+        self.ambient_api = ambient_api
+        self.sink = sink
+        self.mac_addrs = mac_addrs
+        self.max_workers = max_workers
+        self.default_cadence = default_cadence
+        self.margin = margin
+        self.max_backoff = max_backoff
+        self.limit = limit
+        self.clock = clock
+        self.devices = {}
+        self.next_polls = {}
+        self.misses = {}
+        self.errors = {}
+        self.__stop = threading.Event()
+
+    def __repr__(self):
+        return f"WxSyncDaemon(sink={self.sink}, devices={len(self.devices)})"
+
+    def __load_devices(self):
+        if self.mac_addrs:
+            devices = [WxDevice(mac_addr) for mac_addr in self.mac_addrs]
+        else:
+            collection = WxDeviceCollection(self.ambient_api)
+            collection.get_devices()
+            devices = collection.devices
+        now = self.clock()
+        for device in devices:
+            self.devices[device.mac_addr] = device
+            self.misses[device.mac_addr] = 0
+            latest = self.sink.latest(device.mac_addr, count=2)
+            self.next_polls[device.mac_addr] = self.next_poll(latest, 0, now) if latest else now
+
+    def next_poll(self, latest, misses, now):
+        cadence = self.default_cadence
+        if len(latest) == 2 and latest[0] > latest[1]:
+            cadence = (latest[0] - latest[1]) / 1000
+        expected = latest[0] / 1000 + cadence + self.margin
+        if expected > now:
+            return expected
+        return now + min(self.max_backoff, cadence * 2**misses)
+
+    def poll(self, mac_addr):
+        collection = WxObservationCollection(self.ambient_api, device=self.devices[mac_addr])
+        return collection.sync(self.sink, limit=self.limit)
+
+    def __reschedule(self, mac_addr, rows, now):
+        self.misses[mac_addr] = 0 if rows else self.misses[mac_addr] + 1
+        latest = self.sink.latest(mac_addr, count=2)
+        if latest:
+            next_poll = self.next_poll(latest, self.misses[mac_addr], now)
+        else:
+            backoff = self.default_cadence * 2 ** self.misses[mac_addr]
+            next_poll = now + min(self.max_backoff, backoff)
+        self.next_polls[mac_addr] = next_poll
+
+    def run_pending(self, executor):
+        now = self.clock()
+        due = [mac_addr for mac_addr, when in self.next_polls.items() if when <= now]
+        futures = [(mac_addr, executor.submit(self.poll, mac_addr)) for mac_addr in due]
+        written = 0
+        for mac_addr, future in futures:
+            try:
+                rows = future.result()
+                self.errors.pop(mac_addr, None)
+            except (ApiRequestError, Exception) as e:
+                logging.error(f"Sync failed for device {mac_addr}: {e}")
+                self.errors[mac_addr] = e
+                rows = 0
+            written += rows
+            self.__reschedule(mac_addr, rows, self.clock())
+        if due:
+            logging.info(f"Synced {len(due)} devices, {written} new observations")
+        return written
+
+    def __install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        previous = {}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, lambda *args: self.stop())
+        return previous
+
+    def run(self, once=False):
+        self.__stop.clear()
+        previous = self.__install_signal_handlers()
+        try:
+            if not self.devices:
+                self.__load_devices()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while not self.__stop.is_set():
+                    self.run_pending(executor)
+                    if once or not self.next_polls:
+                        break
+                    delay = min(self.next_polls.values()) - self.clock()
+                    self.__stop.wait(max(delay, 1))
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            self.sink.close()
+
+    def stop(self):
+        self.__stop.set()
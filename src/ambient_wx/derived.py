@@ -0,0 +1,100 @@
+import numpy as np
+
+from ambient_wx import units
+
+
+def _magnitude(frame, field, unit):
+    return units.Q_(frame.columns[field].astype(np.float64), frame.units[field]).to(unit).magnitude
+
+
+def heat_index(frame, elevation=None):
+    t = _magnitude(frame, "tempf", "degF")
+    rh = _magnitude(frame, "humidity", "percent")
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+    hi = (
+        -42.379
+        + 2.04901523 * t
+        + 10.14333127 * rh
+        - 0.22475541 * t * rh
+        - 6.83783e-3 * t**2
+        - 5.481717e-2 * rh**2
+        + 1.22874e-3 * t**2 * rh
+        + 8.5282e-4 * t * rh**2
+        - 1.99e-6 * t**2 * rh**2
+    )
+    with np.errstate(invalid="ignore"):
+        dry = (rh < 13) & (t >= 80) & (t <= 112)
+        hi = np.where(dry, hi - (13 - rh) / 4 * np.sqrt((17 - np.abs(t - 95.0)) / 17), hi)
+        humid = (rh > 85) & (t >= 80) & (t <= 87)
+        hi = np.where(humid, hi + (rh - 85) / 10 * (87 - t) / 5, hi)
+        hi = np.where((simple + t) / 2 < 80, simple, hi)
+    return {"heat_index": units.Q_(hi, "degF")}
+
+
+def wind_chill(frame, elevation=None):
+    t = _magnitude(frame, "tempf", "degF")
+    v = _magnitude(frame, "windspeedmph", "mph")
+    with np.errstate(invalid="ignore"):
+        v16 = v**0.16
+        wc = 35.74 + 0.6215 * t - 35.75 * v16 + 0.4275 * t * v16
+        wc = np.where((t <= 50) & (v >= 3), wc, np.nan)
+    return {"wind_chill": units.Q_(wc, "degF")}
+
+
+def vapor_pressure(frame, elevation=None):
+    td = _magnitude(frame, "dewPoint", "degC")
+    e = 6.112 * np.exp(17.67 * td / (td + 243.5))
+    return {"vapor_pressure": units.Q_(e, "hectopascal")}
+
+
+def sea_level_pressure(frame, elevation=None):
+    if elevation is None:
+        raise ValueError("sea_level_pressure requires the station elevation in meters")
+    p = _magnitude(frame, "baromabsin", "hectopascal")
+    t = _magnitude(frame, "tempf", "degC")
+    lapse = 0.0065 * float(elevation)
+    slp = p * (1 - lapse / (t + lapse + 273.15)) ** -5.257
+    return {"sea_level_pressure": units.Q_(slp, "hectopascal")}
+
+
+def wind_components(frame, elevation=None):
+    speed = _magnitude(frame, "windspeedmph", "mph")
+    direction = np.radians(_magnitude(frame, "winddir", "degrees"))
+    return {
+        "wind_u": units.Q_(-speed * np.sin(direction), "mph"),
+        "wind_v": units.Q_(-speed * np.cos(direction), "mph"),
+    }
+
+
+def rain_rate(frame, elevation=None, field="dailyrainin"):
+    order = np.argsort(frame.columns["dateutc"], kind="stable")
+    rain = _magnitude(frame, field, "inches")[order]
+    hours = frame.columns["dateutc"][order].astype(np.float64) / 3600000
+    delta = np.diff(rain)
+    delta = np.where(delta < 0, rain[1:], delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.concatenate([[np.nan], delta / np.diff(hours)])
+    result = np.empty_like(rate)
+    result[order] = rate
+    return {"rain_rate": units.Q_(result, "inches / hour")}
+
+
+DERIVED = {
+    "heat_index": heat_index,
+    "wind_chill": wind_chill,
+    "vapor_pressure": vapor_pressure,
+    "sea_level_pressure": sea_level_pressure,
+    "wind_components": wind_components,
+    "rain_rate": rain_rate,
+}
+
+
+def compute(frame, names, elevation=None):
+    columns = {}
+    for name in names:
+        try:
+            function = DERIVED[name]
+        except KeyError:
+            raise ValueError(f"Unknown derived variable {name}, use one of {list(DERIVED)}")
+        columns.update(function(frame, elevation=elevation))
+    return columns
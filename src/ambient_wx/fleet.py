@@ -0,0 +1,69 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from ambient_wx.ambient_wx import WxObservationCollection
+from ambient_wx.api import ApiRequestError
+
+
+class WxFleet:
+    def __init__(self, device_collection, max_workers=8):
+        self.device_collection = device_collection
+        self.ambient_api = device_collection.ambient_api
+        self.max_workers = max_workers
+        self.collections = {}
+        self.errors = {}
+
+    def __repr__(self):
+        return f"WxFleet(device_collection={self.device_collection})"
+
+    @property
+    def devices(self):
+        if getattr(self.device_collection, "devices", None) is None:
+            self.device_collection.get_devices()
+        return self.device_collection.devices
+
+    def __fetch(self, device, method, kwargs):
+        collection = WxObservationCollection(self.ambient_api, device=device)
+        getattr(collection, method)(**kwargs)
+        return collection
+
+    def __run(self, method, kwargs):
+        self.collections = {}
+        self.errors = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                (device, executor.submit(self.__fetch, device, method, kwargs))
+                for device in self.devices
+            ]
+            for device, future in futures:
+                try:
+                    self.collections[device.mac_addr] = future.result()
+                except (ApiRequestError, Exception) as e:
+                    logging.error(f"{method} failed for device {device.mac_addr}: {e}")
+                    self.errors[device.mac_addr] = e
+
+    def get_observations(self, **kwargs):
+        self.__run("get_observations", kwargs)
+
+    def backfill(self, start, end=None, limit=288, parse_pool=None):
+        kwargs = {"start": start, "end": end, "limit": limit}
+        if parse_pool is not None:
+            kwargs["parse_pool"] = parse_pool
+        self.__run("backfill", kwargs)
+
+    def to_dataframe(self, units=None):
+        import pandas as pd
+
+        frames = {
+            mac_addr: collection.to_dataframe(index="date", units=units)
+            for mac_addr, collection in self.collections.items()
+            if collection.data is not None and len(collection.data)
+        }
+        if not frames:
+            return pd.DataFrame()
+        field_units = {}
+        for frame in frames.values():
+            field_units.update(frame.attrs["units"])
+        df = pd.concat(frames, names=["mac_addr", "date"])
+        df.attrs["units"] = field_units
+        return df
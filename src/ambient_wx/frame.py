@@ -0,0 +1,222 @@
+import numpy as np
+
+from ambient_wx import derived, units
+from ambient_wx.units import FIELD_UNITS
+
+KEY_FIELDS = ("dateutc", "date")
+
+
+def _build_column(name, values):
+    if name == "date":
+        values = [v[:-1] if isinstance(v, str) and v.endswith("Z") else v for v in values]
+        return np.array(values, dtype="datetime64[ms]")
+    if all(type(v) is int for v in values):
+        return np.array(values, dtype=np.int64)
+    if all(v is None or type(v) in (int, float) for v in values):
+        return np.array(values, dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _missing_column(dtype, size):
+    if dtype.kind == "M":
+        return np.full(size, np.datetime64("NaT"), dtype=dtype)
+    if dtype.kind in "iuf":
+        return np.full(size, np.nan)
+    return np.full(size, None, dtype=object)
+
+
+class WxObservationRow:
+    __slots__ = ("_frame", "_index")
+
+    def __init__(self, frame, index):
+        self._frame = frame
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            return self._frame.value(name, self._index)
+        except KeyError:
+            if name in FIELD_UNITS:
+                return None
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        date = self._frame.value("date", self._index) if "date" in self._frame.columns else None
+        return f"WxObservation(dateutc={self.dateutc}, date={date})"
+
+    def set_units(self, field, unit):
+        self._frame.set_units(field, unit)
+
+
+class WxObservationFrame:
+    def __init__(self, columns=None, units=None):
+        self.columns = dict(columns or {"dateutc": np.empty(0, dtype=np.int64)})
+        self.units = dict(units or {})
+        lengths = {len(column) for column in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        records = list(records)
+        size = len(records)
+        values = {}
+        if fields is not None:
+            names = list(dict.fromkeys([*KEY_FIELDS, *fields]))
+            for name in names:
+                column = [record.get(name) for record in records]
+                if any(value is not None for value in column):
+                    values[name] = column
+        for index, record in enumerate(records if fields is None else ()):
+            for name, value in record.items():
+                column = values.get(name)
+                if column is None:
+                    column = values[name] = [None] * size
+                column[index] = value
+        columns = {name: _build_column(name, column) for name, column in values.items()}
+        units = {name: FIELD_UNITS[name] for name in columns if name in FIELD_UNITS}
+        return cls(columns, units)
+
+    @classmethod
+    def concat(cls, frames):
+        frames = [frame for frame in frames if len(frame)]
+        dtypes = {}
+        units = {}
+        for frame in frames:
+            for name, column in frame.columns.items():
+                dtypes.setdefault(name, column.dtype)
+            units.update(frame.units)
+        columns = {}
+        for name, dtype in dtypes.items():
+            parts = [
+                frame.columns[name] if name in frame.columns else _missing_column(dtype, len(frame))
+                for frame in frames
+            ]
+            columns[name] = np.concatenate(parts)
+        return cls(columns, units)
+
+    def __repr__(self):
+        return f"WxObservationFrame(rows={len(self)}, fields={len(self.columns)})"
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield WxObservationRow(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, (slice, np.ndarray)):
+            columns = {name: column[key] for name, column in self.columns.items()}
+            return WxObservationFrame(columns, self.units)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("WxObservationFrame index out of range")
+        return WxObservationRow(self, key)
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def value(self, field, index):
+        column = self.columns[field]
+        value = column[index]
+        if column.dtype.kind == "M":
+            return None if np.isnat(value) else value.astype("datetime64[us]").item()
+        if column.dtype.kind == "f" and np.isnan(value):
+            return None
+        if isinstance(value, np.generic):
+            value = value.item()
+        unit = self.units.get(field)
+        if unit is not None and value is not None:
+            return units.Q_(value, unit)
+        return value
+
+    def to_records(self):
+        records = [{} for _ in range(len(self))]
+        for name, column in self.columns.items():
+            if column.dtype.kind == "M":
+                values = [
+                    None if value == "NaT" else f"{value}Z"
+                    for value in np.datetime_as_string(column, unit="ms")
+                ]
+            else:
+                values = column.tolist()
+            for record, value in zip(records, values):
+                if value is not None and value == value:
+                    record[name] = value
+        return records
+
+    def set_units(self, field, unit):
+        if field not in self.columns:
+            raise KeyError(field)
+        self.units[field] = unit
+
+    def quantity(self, field):
+        return units.Q_(self.columns[field], self.units[field])
+
+    def to_units(self, conversions):
+        if isinstance(conversions, str):
+            conversions = units.system_units(self.units, conversions)
+        columns = dict(self.columns)
+        field_units = dict(self.units)
+        for field, target in conversions.items():
+            if field not in field_units:
+                raise ValueError(f"Field {field} has no units to convert")
+            columns[field] = units.Q_(columns[field], field_units[field]).to(target).magnitude
+            field_units[field] = target
+        return WxObservationFrame(columns, field_units)
+
+    def select(self, fields):
+        names = dict.fromkeys([*KEY_FIELDS, *fields])
+        columns = {name: self.columns[name] for name in names if name in self.columns}
+        field_units = {name: unit for name, unit in self.units.items() if name in columns}
+        return WxObservationFrame(columns, field_units)
+
+    def with_derived(self, names, elevation=None):
+        columns = dict(self.columns)
+        field_units = dict(self.units)
+        for name, quantity in derived.compute(self, names, elevation=elevation).items():
+            columns[name] = quantity.magnitude
+            field_units[name] = str(quantity.units)
+        return WxObservationFrame(columns, field_units)
+
+    def to_dataframe(self, index=None, units=None, derived=None, elevation=None, fields=None):
+        import pandas as pd
+
+        if derived:
+            frame = self.with_derived(derived, elevation=elevation)
+            if fields is not None:
+                fields = [*fields, *(name for name in frame.columns if name not in self.columns)]
+            return frame.to_dataframe(index=index, units=units, fields=fields)
+        if fields is not None:
+            return self.select(fields).to_dataframe(index=index, units=units)
+        if units is not None:
+            return self.to_units(units).to_dataframe(index=index)
+        df = pd.DataFrame(self.columns, copy=False)
+        df.attrs["units"] = dict(self.units)
+        if index == "dateutc":
+            df.index = pd.to_datetime(self.columns["dateutc"], unit="ms", utc=True)
+        elif index == "date":
+            date = self.columns.get("date")
+            if date is None:
+                date = self.columns["dateutc"].astype("datetime64[ms]")
+            df.index = pd.DatetimeIndex(date)
+        elif index is not None:
+            raise ValueError(f"Unsupported index {index}, use 'date' or 'dateutc'")
+        if index is not None:
+            df.index.name = index
+        return df
+
+    def write_csv(self, filepath, chunksize=50000, index=None, fields=None):
+        if fields is not None:
+            return self.select(fields).write_csv(filepath, chunksize=chunksize, index=index)
+        with open(filepath, "w", newline="") as f:
+            for start in range(0, max(len(self), 1), chunksize):
+                stop = start + chunksize
+                chunk = self[start:stop].to_dataframe(index=index)
+                chunk.to_csv(f, header=start == 0, index=index is not None)
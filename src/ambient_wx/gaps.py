@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class WxGapIndex:
+    def __init__(self, dateutc, cadence=None, tolerance=1.5):
+        dateutc = np.unique(np.asarray(dateutc, dtype=np.int64))
+        steps = np.diff(dateutc)
+        if cadence is None:
+            cadence = int(np.median(steps)) if len(steps) else 0
+        self.cadence = int(cadence)
+        self.tolerance = tolerance
+        if self.cadence:
+            positions = np.flatnonzero(steps > self.cadence * tolerance)
+        else:
+            positions = np.empty(0, dtype=np.int64)
+        self.starts = dateutc[positions]
+        self.ends = dateutc[positions + 1]
+
+    @classmethod
+    def from_frame(cls, frame, cadence=None, tolerance=1.5):
+        if frame is None or not len(frame):
+            return cls([], cadence=cadence, tolerance=tolerance)
+        return cls(frame.columns["dateutc"], cadence=cadence, tolerance=tolerance)
+
+    def __repr__(self):
+        return f"WxGapIndex(cadence={self.cadence}, gaps={len(self)})"
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    def between(self, start_ms=None, end_ms=None):
+        lo = 0 if start_ms is None else int(np.searchsorted(self.ends, start_ms, side="right"))
+        hi = len(self) if end_ms is None else int(np.searchsorted(self.starts, end_ms, side="left"))
+        return list(zip(self.starts[lo:hi].tolist(), self.ends[lo:hi].tolist()))
+
+    def contains(self, dateutc):
+        dateutc = np.asarray(dateutc, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(dateutc), dtype=bool)
+        positions = np.searchsorted(self.starts, dateutc, side="left") - 1
+        return (positions >= 0) & (dateutc < self.ends[positions.clip(min=0)])
+
+    def missing(self):
+        if not len(self):
+            return 0
+        return int(((self.ends - self.starts) // self.cadence - 1).clip(min=1).sum())
+
+    def plan(self, limit=288):
+        requests = []
+        for start, end in reversed(list(self)):
+            if requests:
+                last_end, _, _ = requests[-1]
+                rows = (last_end - start) // self.cadence + 1
+                if rows <= limit:
+                    requests[-1] = (last_end, rows, start)
+                    continue
+            requests.append((end, min(limit, (end - start) // self.cadence + 1), start))
+        return requests
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+_listeners = ()
+_listeners_lock = threading.Lock()
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def add_listener(listener):
+    global _listeners
+    with _listeners_lock:
+        _listeners = (*_listeners, listener)
+    return listener
+
+
+def remove_listener(listener):
+    global _listeners
+    with _listeners_lock:
+        _listeners = tuple(item for item in _listeners if item != listener)
+
+
+def enabled():
+    return bool(_listeners)
+
+
+def emit(event, **fields):
+    listeners = _listeners
+    if not listeners:
+        return
+    fields["event"] = event
+    for listener in listeners:
+        try:
+            listener(fields)
+        except Exception:
+            logging.exception(f"Instrumentation listener {listener} failed")
+
+
+@contextmanager
+def timed(event, **fields):
+    if not _listeners:
+        yield fields
+        return
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        emit(event, duration=time.perf_counter() - start, **fields)
+
+
+def _labels(**labels):
+    items = ",".join(f'{name}="{value}"' for name, value in labels.items())
+    return f"{{{items}}}" if items else ""
+
+
+class MetricsAggregator:
+    prefix = "ambient_wx"
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return f"MetricsAggregator(requests={sum(self.requests.values())})"
+
+    def __call__(self, event):
+        with self.__lock:
+            name = event["event"]
+            if name == "request":
+                self.__request(event)
+            elif name == "retry":
+                status = event.get("status_code") or "error"
+                self.retries[status] = self.retries.get(status, 0) + 1
+            elif name == "cache":
+                self.cache[event["hit"]] += 1
+            elif name == "stage":
+                stage = event["stage"]
+                count, total, rows = self.stages.get(stage, (0, 0.0, 0))
+                self.stages[stage] = (
+                    count + 1,
+                    total + event["duration"],
+                    rows + (event.get("rows") or 0),
+                )
+
+    def __request(self, event):
+        status = event.get("status_code") or "error"
+        self.requests[status] = self.requests.get(status, 0) + 1
+        self.response_bytes += event.get("bytes") or 0
+        duration = event["duration"]
+        self.duration_sum += duration
+        for index, bound in enumerate(self.buckets):
+            if duration <= bound:
+                self.duration_buckets[index] += 1
+
+    def reset(self):
+        with self.__lock:
+            self.requests = {}
+            self.retries = {}
+            self.stages = {}
+            self.cache = {True: 0, False: 0}
+            self.response_bytes = 0
+            self.duration_sum = 0.0
+            self.duration_buckets = [0] * len(self.buckets)
+
+    def to_prometheus(self):
+        prefix = self.prefix
+        with self.__lock:
+            lines = [
+                f"# HELP {prefix}_requests_total API GET requests by status code.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for status, count in sorted(self.requests.items(), key=str):
+                lines.append(f"{prefix}_requests_total{_labels(status=status)} {count}")
+            lines += [
+                f"# HELP {prefix}_request_duration_seconds API GET request duration.",
+                f"# TYPE {prefix}_request_duration_seconds histogram",
+            ]
+            for bound, count in zip(self.buckets, self.duration_buckets):
+                lines.append(f"{prefix}_request_duration_seconds_bucket{_labels(le=bound)} {count}")
+            total = sum(self.requests.values())
+            lines += [
+                f'{prefix}_request_duration_seconds_bucket{{le="+Inf"}} {total}',
+                f"{prefix}_request_duration_seconds_sum {self.duration_sum}",
+                f"{prefix}_request_duration_seconds_count {total}",
+                f"# HELP {prefix}_response_bytes_total Response body bytes received.",
+                f"# TYPE {prefix}_response_bytes_total counter",
+                f"{prefix}_response_bytes_total {self.response_bytes}",
+                f"# HELP {prefix}_retries_total Retried API requests by status code.",
+                f"# TYPE {prefix}_retries_total counter",
+            ]
+            for status, count in sorted(self.retries.items(), key=str):
+                lines.append(f"{prefix}_retries_total{_labels(status=status)} {count}")
+            lines += [
+                f"# HELP {prefix}_cache_requests_total Response cache lookups by result.",
+                f"# TYPE {prefix}_cache_requests_total counter",
+                f'{prefix}_cache_requests_total{{result="hit"}} {self.cache[True]}',
+                f'{prefix}_cache_requests_total{{result="miss"}} {self.cache[False]}',
+                f"# HELP {prefix}_stage_duration_seconds Parse and convert stage duration.",
+                f"# TYPE {prefix}_stage_duration_seconds summary",
+            ]
+            for stage, (count, total, _) in sorted(self.stages.items()):
+                labels = _labels(stage=stage)
+                lines.append(f"{prefix}_stage_duration_seconds_sum{labels} {total}")
+                lines.append(f"{prefix}_stage_duration_seconds_count{labels} {count}")
+            lines += [
+                f"# HELP {prefix}_stage_rows_total Observation rows handled per stage.",
+                f"# TYPE {prefix}_stage_rows_total counter",
+            ]
+            for stage, (_, _, rows) in sorted(self.stages.items()):
+                lines.append(f"{prefix}_stage_rows_total{_labels(stage=stage)} {rows}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,49 @@
+import codecs
+import json
+import re
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def get_loads(backend=None):
+    if backend in (None, "json"):
+        return json.loads
+    if backend == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("orjson is required for json_backend='orjson'") from None
+        return orjson.loads
+    raise ValueError(f"Unknown JSON backend {backend}, use 'json' or 'orjson'")
+
+
+def iter_json_array(chunks, batch_size=1000):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    batch = []
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        index = _SEPARATORS.match(buffer).end()
+        if not started and index < len(buffer):
+            if buffer[index] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            index = _SEPARATORS.match(buffer, index + 1).end()
+        while started and index < len(buffer):
+            if buffer[index] == "]":
+                if batch:
+                    yield batch
+                return
+            try:
+                record, index = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError:
+                break
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+            index = _SEPARATORS.match(buffer, index).end()
+        buffer = buffer[index:]
+    raise ValueError("Truncated JSON array")
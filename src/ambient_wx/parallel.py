@@ -0,0 +1,139 @@
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from ambient_wx.frame import WxObservationFrame
+from ambient_wx.jsonstream import get_loads
+
+_DATEUTC = re.compile(rb'"dateutc"\s*:\s*(\d+)')
+
+
+def oldest_dateutc(content):
+    position = content.rfind(b'"dateutc"')
+    if position < 0:
+        return None
+    match = _DATEUTC.match(content, position)
+    return int(match.group(1)) if match else None
+
+
+def _pack(frame):
+    numeric = [(name, column) for name, column in frame.columns.items() if column.dtype != object]
+    objects = {
+        name: column.tolist() for name, column in frame.columns.items() if column.dtype == object
+    }
+    layout = []
+    size = 0
+    for name, column in numeric:
+        layout.append((name, column.dtype.str, size, len(column)))
+        size += column.nbytes
+    if not size:
+        return None, layout, objects, list(frame.columns), frame.units
+    block = shared_memory.SharedMemory(create=True, size=size)
+    resource_tracker.unregister(block._name, "shared_memory")
+    for (_, column), (_, _, offset, _) in zip(numeric, layout):
+        target = np.ndarray(column.shape, dtype=column.dtype, buffer=block.buf, offset=offset)
+        target[:] = column
+    del target
+    block.close()
+    return block.name, layout, objects, list(frame.columns), frame.units
+
+
+def _unpack(packed):
+    name, layout, objects, order, units = packed
+    columns = {}
+    if name is None:
+        for field, dtype, _, length in layout:
+            columns[field] = np.empty(length, dtype=np.dtype(dtype))
+    else:
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            for field, dtype, offset, length in layout:
+                view = np.ndarray(length, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+                columns[field] = view.copy()
+            del view
+        finally:
+            block.close()
+            block.unlink()
+    for field, values in objects.items():
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        columns[field] = column
+    return WxObservationFrame({field: columns[field] for field in order}, units)
+
+
+def _release(packed):
+    name = packed[0]
+    if name is None:
+        return
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def parse_page(content, start_ms=None, before_ms=None, fields=None, units=None, json_backend=None):
+    records = get_loads(json_backend)(content)
+    if start_ms is not None or before_ms is not None:
+        records = [
+            record
+            for record in records
+            if (start_ms is None or record["dateutc"] >= start_ms)
+            and (before_ms is None or record["dateutc"] < before_ms)
+        ]
+    frame = WxObservationFrame.from_records(records, fields=fields)
+    if units is not None and len(frame):
+        frame = frame.to_units(units)
+    return _pack(frame)
+
+
+class ParsePool:
+    def __init__(self, processes=None, fields=None, units=None, json_backend=None):
+        self.processes = processes
+        self.fields = fields
+        self.units = units
+        self.json_backend = json_backend
+        self.__executor = ProcessPoolExecutor(max_workers=processes, mp_context=_mp_context())
+
+    def __repr__(self):
+        return f"ParsePool(processes={self.processes}, units={self.units})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, content, start_ms=None, before_ms=None):
+        return self.__executor.submit(
+            parse_page, content, start_ms, before_ms, self.fields, self.units, self.json_backend
+        )
+
+    @staticmethod
+    def result(future):
+        return _unpack(future.result())
+
+    @staticmethod
+    def discard(future):
+        if future.cancel():
+            return
+        try:
+            packed = future.result()
+        except Exception:
+            return
+        _release(packed)
+
+    def parse(self, content, start_ms=None, before_ms=None):
+        return self.result(self.submit(content, start_ms, before_ms))
+
+    def close(self):
+        self.__executor.shutdown(wait=True)
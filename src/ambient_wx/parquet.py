@@ -0,0 +1,127 @@
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from ambient_wx.frame import KEY_FIELDS, WxObservationFrame
+
+PARTITION_COLUMNS = ["mac_addr", "day"]
+DAY = 86400000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required for Arrow and Parquet support, "
+            "install it with pip install ambient_wx[parquet]"
+        ) from None
+    return pyarrow
+
+
+def to_arrow(frame, mac_addr=None):
+    pa = _pyarrow()
+    arrays = []
+    fields = []
+    for name, column in frame.columns.items():
+        if column.dtype == object:
+            array = pa.array(column.tolist(), from_pandas=True)
+        elif column.dtype.kind in "iu" and name != "dateutc":
+            array = pa.array(column, type=pa.float64())
+        else:
+            array = pa.array(column, from_pandas=True)
+        metadata = {"unit": frame.units[name]} if name in frame.units else None
+        arrays.append(array)
+        fields.append(pa.field(name, array.type, metadata=metadata))
+    if mac_addr is not None:
+        arrays.append(pa.array([mac_addr] * len(frame), type=pa.string()))
+        fields.append(pa.field("mac_addr", pa.string()))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def from_arrow(table):
+    columns = {}
+    units = {}
+    for field in table.schema:
+        if field.name in PARTITION_COLUMNS:
+            continue
+        values = table.column(field.name).to_numpy()
+        if values.dtype.kind == "M":
+            values = values.astype("datetime64[ms]")
+        columns[field.name] = values
+        if field.metadata and b"unit" in field.metadata:
+            units[field.name] = field.metadata[b"unit"].decode()
+    return WxObservationFrame(columns, units)
+
+
+def _days(frame):
+    return np.datetime_as_string(frame.columns["dateutc"].astype("datetime64[ms]"), unit="D")
+
+
+def write_parquet(frame, root, mac_addr):
+    pa = _pyarrow()
+    days = _days(frame)
+    if len(frame) and Path(root).exists():
+        dateutc = frame.columns["dateutc"]
+        start = int(dateutc.min() - dateutc.min() % DAY)
+        end = int(dateutc.max() - dateutc.max() % DAY + DAY)
+        existing = read_parquet(root, mac_addr, start_ms=start, end_ms=end)
+        if len(existing):
+            existing = existing[np.isin(_days(existing), days)]
+            frame = WxObservationFrame.concat([frame, existing])
+            _, first = np.unique(frame.columns["dateutc"], return_index=True)
+            frame = frame[first]
+            days = _days(frame)
+    table = to_arrow(frame, mac_addr=mac_addr)
+    table = table.append_column("day", pa.array(days, type=pa.string()))
+    pa.parquet.write_to_dataset(
+        table,
+        root,
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="delete_matching",
+    )
+
+
+def read_parquet(root, mac_addr=None, start_ms=None, end_ms=None, columns=None):
+    pa = _pyarrow()
+    ds = pa.dataset
+    expression = None
+    conditions = []
+    if mac_addr is not None:
+        conditions.append(ds.field("mac_addr") == mac_addr)
+    if start_ms is not None:
+        start_day = str(np.datetime64(start_ms, "ms").astype("datetime64[D]"))
+        conditions.append(ds.field("day") >= start_day)
+        conditions.append(ds.field("dateutc") >= start_ms)
+    if end_ms is not None:
+        end_day = str(np.datetime64(end_ms, "ms").astype("datetime64[D]"))
+        conditions.append(ds.field("day") <= end_day)
+        conditions.append(ds.field("dateutc") < end_ms)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    if not dataset.schema.names:
+        return WxObservationFrame()
+    fragments = list(dataset.get_fragments(filter=expression))
+    if not fragments:
+        return WxObservationFrame()
+    schema = pa.unify_schemas(
+        [fragment.physical_schema for fragment in fragments] + [dataset.partitioning.schema]
+    )
+    dataset = ds.dataset(
+        [fragment.path for fragment in fragments],
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(dataset.partitioning.schema, flavor="hive"),
+        partition_base_dir=str(root),
+    )
+    if columns is not None:
+        keys = [name for name in KEY_FIELDS if name in schema.names]
+        columns = list(dict.fromkeys([*keys, *columns]))
+    table = dataset.to_table(columns=columns, filter=expression)
+    table = table.sort_by([("dateutc", "descending")])
+    return from_arrow(table)
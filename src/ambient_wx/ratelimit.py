@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.__updated = clock()
+        self.__lock = threading.Lock()
+
+    def __repr__(self):
+        return f"TokenBucket(rate={self.rate}, capacity={self.capacity})"
+
+    def reserve(self):
+        with self.__lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    api_key_rate = 1
+    application_key_rate = 3
+    __buckets = {}
+    __limiters = {}
+    __registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        api_key,
+        application_key,
+        api_key_rate=None,
+        application_key_rate=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.buckets = [
+            self.__bucket("apiKey", api_key, api_key_rate or self.api_key_rate, clock),
+            self.__bucket(
+                "applicationKey",
+                application_key,
+                application_key_rate or self.application_key_rate,
+                clock,
+            ),
+        ]
+        self.__sleep = sleep
+        self.__lock = threading.Lock()
+        self.requests = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __repr__(self):
+        return f"RateLimiter(buckets={self.buckets})"
+
+    @classmethod
+    def __bucket(cls, kind, key, rate, clock):
+        digest = hashlib.sha256(f"{kind}:{key}".encode()).hexdigest()
+        with cls.__registry_lock:
+            bucket = cls.__buckets.get(digest)
+            if bucket is None:
+                bucket = cls.__buckets[digest] = TokenBucket(rate, clock=clock)
+        if bucket.rate != rate or bucket.clock != clock:
+            raise ValueError(
+                f"{kind} is already limited to {bucket.rate} requests per second "
+                f"with clock {bucket.clock}, cannot share it at {rate} with clock {clock}"
+            )
+        return bucket
+
+    @classmethod
+    def for_credentials(cls, api_key, application_key):
+        digest = hashlib.sha256(f"{api_key}:{application_key}".encode()).hexdigest()
+        with cls.__registry_lock:
+            limiter = cls.__limiters.get(digest)
+        if limiter is None:
+            limiter = cls(api_key, application_key)
+            with cls.__registry_lock:
+                limiter = cls.__limiters.setdefault(digest, limiter)
+        return limiter
+
+    def acquire(self):
+        wait = max(bucket.reserve() for bucket in self.buckets)
+        with self.__lock:
+            self.requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait:
+                self.waiting += 1
+        if wait:
+            logging.debug(f"Rate limit: waiting {wait:.3f}s before request")
+            try:
+                self.__sleep(wait)
+            finally:
+                with self.__lock:
+                    self.waiting -= 1
+        return wait
+
+    @property
+    def stats(self):
+        with self.__lock:
+            return {
+                "requests": self.requests,
+                "queue_depth": self.waiting,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "mean_wait": self.total_wait / self.requests if self.requests else 0.0,
+            }
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import requests
+
+from ambient_wx.ambient_wx import WxDevice
+
+
+def encode_payload(packets):
+    return "".join(f"{len(packet)}:{packet}" for packet in packets)
+
+
+def decode_payload(payload):
+    packets = []
+    index = 0
+    while index < len(payload):
+        colon = payload.index(":", index)
+        start = colon + 1
+        end = start + int(payload[index:colon])
+        packets.append(payload[start:end])
+        index = end
+    return packets
+
+
+class RealtimeDisconnect(Exception):
+    pass
+
+
+class WxRealtimeClient:
+    default_url = "https://rt2.ambientweather.net"
+    connect_timeout = 5
+
+    def __init__(
+        self,
+        ambient_api,
+        api_keys=None,
+        url=None,
+        batch_interval=0,
+        backoff_factor=1.0,
+        max_backoff=60,
+    ):
+        self.ambient_api = ambient_api
+        self.api_keys = api_keys or [ambient_api.api_key]
+        self.url = f"{(url or self.default_url).rstrip('/')}/socket.io/"
+        self.batch_interval = batch_interval
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.session = ambient_api.session
+        self.subscribed = []
+        self.__callbacks = []
+        self.__pending = []
+        self.__batch_started = None
+        self.__sid = None
+        self.__ping_interval = 25
+        self.__ping_timeout = 20
+        self.__stop = threading.Event()
+
+    def __repr__(self):
+        return f"WxRealtimeClient(url={self.url}, api_keys=***)"
+
+    def on_data(self, callback):
+        self.__callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback):
+        self.__callbacks.remove(callback)
+
+    def __params(self):
+        params = {
+            "EIO": 3,
+            "transport": "polling",
+            "b64": 1,
+            "api": 1,
+            "applicationKey": self.ambient_api.application_key,
+            "t": f"{time.time():.6f}",
+        }
+        if self.__sid is not None:
+            params["sid"] = self.__sid
+        return params
+
+    def __send(self, *packets):
+        response = self.session.post(
+            self.url,
+            params=self.__params(),
+            data=encode_payload(packets).encode(),
+            headers={"Content-Type": "text/plain;charset=UTF-8"},
+            timeout=(self.connect_timeout, self.__ping_timeout),
+        )
+        response.raise_for_status()
+
+    def __poll(self):
+        response = self.session.get(
+            self.url,
+            params=self.__params(),
+            timeout=(self.connect_timeout, self.__ping_interval + self.__ping_timeout),
+        )
+        response.raise_for_status()
+        return decode_payload(response.text)
+
+    def __connect(self):
+        self.__sid = None
+        packets = self.__poll()
+        if not packets or not packets[0].startswith("0"):
+            raise RealtimeDisconnect("Unexpected realtime handshake")
+        handshake = json.loads(packets[0][1:])
+        self.__sid = handshake["sid"]
+        self.__ping_interval = handshake.get("pingInterval", 25000) / 1000
+        self.__ping_timeout = handshake.get("pingTimeout", 20000) / 1000
+        self.__send("42" + json.dumps(["subscribe", {"apiKeys": self.api_keys}]))
+        logging.info(f"Realtime connected: {self.url}")
+        return packets[1:]
+
+    def __ping_loop(self, sid):
+        while not self.__stop.wait(self.__ping_interval) and self.__sid == sid:
+            try:
+                self.__send("2")
+            except requests.exceptions.RequestException:
+                return
+
+    def __handle(self, packet):
+        if packet.startswith("1") or packet.startswith("41"):
+            raise RealtimeDisconnect("Realtime server closed the connection")
+        if not packet.startswith("42"):
+            return
+        event, *args = json.loads(packet[2:])
+        if event == "subscribed":
+            devices = args[0].get("devices", []) if args else []
+            self.subscribed = [device["macAddress"] for device in devices]
+        elif event == "data":
+            record = dict(args[0])
+            record.pop("device", None)
+            mac_addr = record.pop("macAddress", None)
+            if not self.__pending:
+                self.__batch_started = time.monotonic()
+            self.__pending.append(WxDevice(mac_addr, data=record))
+
+    def __flush(self, force=False):
+        if not self.__pending:
+            return
+        if not force and time.monotonic() - self.__batch_started < self.batch_interval:
+            return
+        batch, self.__pending = self.__pending, []
+        for callback in list(self.__callbacks):
+            try:
+                callback(batch)
+            except Exception:
+                logging.exception(f"Realtime callback {callback} failed")
+
+    def run(self):
+        self.__stop.clear()
+        attempt = 0
+        while not self.__stop.is_set():
+            try:
+                packets = self.__connect()
+                attempt = 0
+                threading.Thread(target=self.__ping_loop, args=(self.__sid,), daemon=True).start()
+                while not self.__stop.is_set():
+                    for packet in packets:
+                        self.__handle(packet)
+                    self.__flush()
+                    packets = self.__poll()
+            except (requests.exceptions.RequestException, RealtimeDisconnect, ValueError) as e:
+                if self.__stop.is_set():
+                    break
+                delay = min(self.max_backoff, self.backoff_factor * 2**attempt)
+                attempt += 1
+                logging.warning(f"Realtime connection lost ({e}), reconnecting in {delay:.1f}s")
+                self.__stop.wait(delay)
+        self.__flush(force=True)
+        self.__sid = None
+
+    def stop(self):
+        self.__stop.set()
+        if self.__sid is not None:
+            try:
+                self.__send("1")
+            except requests.exceptions.RequestException:
+                pass
+
+    async def stream(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def callback(batch):
+            loop.call_soon_threadsafe(queue.put_nowait, batch)
+
+        self.on_data(callback)
+        task = loop.run_in_executor(None, self.run)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            await loop.run_in_executor(None, self.stop)
+            self.remove_callback(callback)
+            await task
@@ -0,0 +1,274 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from ambient_wx.frame import WxObservationFrame
+
+FREQUENCIES = {"hour": 3600000, "day": 86400000}
+SKIP_FIELDS = {"dateutc", "date"}
+SLOT = 60000
+
+
+def _reduce(stats, reducer):
+    count, total, minimum, maximum = stats
+    if reducer == "min":
+        return minimum
+    if reducer == "max":
+        return maximum
+    return total / count
+
+
+def _rain_delta(values):
+    values = np.asarray(values, dtype=np.float64)
+    deltas = np.diff(values)
+    return float(np.where(deltas < 0, values[1:], deltas).sum())
+
+
+class WxRollup:
+    reducers = {
+        "winddir": "vector_mean",
+        "windgustmph": "max",
+        "maxdailygust": "max",
+        "dailyrainin": "rain_sum",
+    }
+
+    def __init__(self, freq="hour", open_buckets=2):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unknown rollup frequency {freq}, use one of {list(FREQUENCIES)}")
+        self.freq = freq
+        self.size = FREQUENCIES[freq]
+        self.open_buckets = open_buckets
+        self.latest = None
+        self.units = {}
+        self.buckets = {}
+        self.__open = set()
+
+    def __repr__(self):
+        return f"WxRollup(freq={self.freq}, buckets={len(self.buckets)})"
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def __bucket(self, key):
+        if key not in self.buckets:
+            self.buckets[key] = {
+                "count": 0,
+                "first": None,
+                "last": None,
+                "stats": {},
+                "wind": [0.0, 0.0, 0],
+                "rain": None,
+                "seen": set(),
+                "samples": {},
+            }
+            self.__open.add(key)
+        return self.buckets[key]
+
+    def update(self, frame):
+        if frame is None or not len(frame):
+            return set()
+        order = np.argsort(frame.columns["dateutc"], kind="stable")
+        dateutc = frame.columns["dateutc"][order]
+        keys = dateutc - dateutc % self.size
+        new = np.ones(len(dateutc), dtype=bool)
+        new[1:] = dateutc[1:] != dateutc[:-1]
+        for key in np.unique(keys):
+            bucket = self.buckets.get(int(key))
+            if bucket is None:
+                continue
+            in_bucket = keys == key
+            if "seen" in bucket:
+                new[in_bucket] &= ~np.isin(dateutc[in_bucket], list(bucket["seen"]))
+            else:
+                slots = (dateutc[in_bucket] - key) // SLOT
+                new[in_bucket] &= [not bucket["slots"] >> int(slot) & 1 for slot in slots]
+        if not new.any():
+            return set()
+        order = order[new]
+        dateutc = dateutc[new]
+        keys = keys[new]
+        bucket_keys, starts = np.unique(keys, return_index=True)
+        stops = [*starts[1:], len(keys)]
+        buckets = [self.__bucket(int(key)) for key in bucket_keys]
+        for key, bucket, start, stop in zip(bucket_keys, buckets, starts, stops):
+            first, last = int(dateutc[start]), int(dateutc[stop - 1])
+            bucket["count"] += int(stop - start)
+            bucket["first"] = first if bucket["first"] is None else min(bucket["first"], first)
+            bucket["last"] = last if bucket["last"] is None else max(bucket["last"], last)
+            if "seen" in bucket:
+                bucket["seen"].update(dateutc[start:stop].tolist())
+            else:
+                bucket["slots"] |= self.__slots(key, dateutc[start:stop])
+        for name, column in frame.columns.items():
+            if name in SKIP_FIELDS or column.dtype.kind not in "iuf":
+                continue
+            if name in frame.units:
+                self.units.setdefault(name, frame.units[name])
+            values = column[order].astype(np.float64)
+            reducer = self.reducers.get(name, "stats")
+            if reducer == "vector_mean":
+                self.__reduce_wind(buckets, starts, values)
+            elif reducer == "rain_sum":
+                for bucket, start, stop in zip(buckets, starts, stops):
+                    present = ~np.isnan(values[start:stop])
+                    if present.any():
+                        times = dateutc[start:stop][present].tolist()
+                        self.__update_rain(bucket, times, values[start:stop][present].tolist())
+            else:
+                self.__reduce_stats(name, buckets, starts, values)
+        newest = int(dateutc[-1])
+        self.latest = newest if self.latest is None else max(self.latest, newest)
+        self.__close()
+        affected = {int(key) for key in bucket_keys}
+        return affected | {key + self.size for key in affected if key + self.size in self.buckets}
+
+    def __update_rain(self, bucket, times, values):
+        if "samples" in bucket:
+            bucket["samples"].update(zip(times, values))
+            samples = sorted(bucket["samples"].items())
+            times = [time for time, _ in samples]
+            values = [value for _, value in samples]
+            bucket["rain"] = [times[0], values[0], times[-1], values[-1], _rain_delta(values)]
+            return
+        rain = bucket["rain"]
+        if rain is None:
+            bucket["rain"] = [times[0], values[0], times[-1], values[-1], _rain_delta(values)]
+            return
+        before = [value for time, value in zip(times, values) if time < rain[0]]
+        after = [value for time, value in zip(times, values) if time > rain[2]]
+        if before:
+            rain[4] += _rain_delta([*before, rain[1]])
+            rain[0], rain[1] = times[0], before[0]
+        if after:
+            rain[4] += _rain_delta([rain[3], *after])
+            rain[2], rain[3] = times[-1], after[-1]
+
+    def __slots(self, key, dateutcs):
+        slots = 0
+        for slot in np.unique((np.asarray(dateutcs, dtype=np.int64) - key) // SLOT):
+            slots |= 1 << int(slot)
+        return slots
+
+    def __close(self):
+        threshold = self.latest - self.latest % self.size - (self.open_buckets - 1) * self.size
+        for key in [key for key in self.__open if key < threshold]:
+            self.__open.discard(key)
+            bucket = self.buckets[key]
+            bucket["slots"] = self.__slots(key, list(bucket.pop("seen")))
+            bucket.pop("samples")
+
+    def __reduce_stats(self, name, buckets, starts, values):
+        present = ~np.isnan(values)
+        counts = np.add.reduceat(present, starts)
+        sums = np.add.reduceat(np.where(present, values, 0.0), starts)
+        minimums = np.fmin.reduceat(values, starts)
+        maximums = np.fmax.reduceat(values, starts)
+        for bucket, count, total, low, high in zip(buckets, counts, sums, minimums, maximums):
+            if not count:
+                continue
+            stats = bucket["stats"].get(name)
+            if stats is None:
+                bucket["stats"][name] = [int(count), float(total), float(low), float(high)]
+            else:
+                stats[0] += int(count)
+                stats[1] += float(total)
+                stats[2] = min(stats[2], float(low))
+                stats[3] = max(stats[3], float(high))
+
+    def __reduce_wind(self, buckets, starts, values):
+        present = ~np.isnan(values)
+        radians = np.radians(np.where(present, values, 0.0))
+        sines = np.add.reduceat(np.where(present, np.sin(radians), 0.0), starts)
+        cosines = np.add.reduceat(np.where(present, np.cos(radians), 0.0), starts)
+        counts = np.add.reduceat(present, starts)
+        for bucket, sine, cosine, count in zip(buckets, sines, cosines, counts):
+            bucket["wind"][0] += float(sine)
+            bucket["wind"][1] += float(cosine)
+            bucket["wind"][2] += int(count)
+
+    def rain_sum(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None or bucket["rain"] is None:
+            return np.nan
+        delta = bucket["rain"][4]
+        previous = self.buckets.get(key - self.size)
+        if previous is not None and previous["rain"] is not None:
+            delta += _rain_delta([previous["rain"][3], bucket["rain"][1]])
+        return delta
+
+    def to_frame(self):
+        keys = sorted(self.buckets, reverse=True)
+        columns = {
+            "dateutc": np.array(keys, dtype=np.int64),
+            "count": np.array([self.buckets[key]["count"] for key in keys], dtype=np.int64),
+        }
+        units = {}
+        stat_fields = sorted({name for bucket in self.buckets.values() for name in bucket["stats"]})
+        for name in stat_fields:
+            stats = [self.buckets[key]["stats"].get(name) for key in keys]
+            suffixes = ["max"] if self.reducers.get(name) == "max" else ["min", "max", "mean"]
+            for suffix in suffixes:
+                values = [np.nan if stat is None else _reduce(stat, suffix) for stat in stats]
+                columns[f"{name}_{suffix}"] = np.array(values, dtype=np.float64)
+                if name in self.units:
+                    units[f"{name}_{suffix}"] = self.units[name]
+        if any(self.buckets[key]["wind"][2] for key in keys):
+            winds = [self.buckets[key]["wind"] for key in keys]
+            directions = [
+                (np.degrees(np.arctan2(sine, cosine)) + 360) % 360 if count else np.nan
+                for sine, cosine, count in winds
+            ]
+            columns["winddir_mean"] = np.array(directions, dtype=np.float64)
+            if "winddir" in self.units:
+                units["winddir_mean"] = self.units["winddir"]
+        if any(self.buckets[key]["rain"] is not None for key in keys):
+            columns["rain_sum"] = np.array([self.rain_sum(key) for key in keys], dtype=np.float64)
+            if "dailyrainin" in self.units:
+                units["rain_sum"] = self.units["dailyrainin"]
+        return WxObservationFrame(columns, units)
+
+    def save(self, path):
+        buckets = {}
+        for key, bucket in self.buckets.items():
+            state = {name: bucket[name] for name in ("count", "first", "last", "stats", "wind")}
+            state["rain"] = bucket["rain"]
+            if key in self.__open:
+                state["seen"] = sorted(bucket["seen"])
+                state["samples"] = sorted(bucket["samples"].items())
+            else:
+                state["slots"] = f"{bucket['slots']:x}"
+            buckets[str(key)] = state
+        state = {
+            "version": 2,
+            "freq": self.freq,
+            "open_buckets": self.open_buckets,
+            "latest": self.latest,
+            "units": self.units,
+            "buckets": buckets,
+        }
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != 2:
+            raise ValueError(f"Unsupported rollup state version {state.get('version')} in {path}")
+        rollup = cls(state["freq"], open_buckets=state["open_buckets"])
+        rollup.latest = state["latest"]
+        rollup.units = state["units"]
+        for key, bucket in state["buckets"].items():
+            if "seen" in bucket:
+                bucket["seen"] = set(bucket["seen"])
+                bucket["samples"] = {dateutc: value for dateutc, value in bucket["samples"]}
+                rollup.__open.add(int(key))
+            else:
+                bucket["slots"] = int(bucket["slots"], 16)
+            rollup.buckets[int(key)] = bucket
+        return rollup
@@ -0,0 +1,70 @@
+import json
+import sqlite3
+import threading
+
+from ambient_wx.frame import WxObservationFrame
+
+
+class WxObservationStore:
+    def __init__(self, path):
+        self.path = path
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                "mac_addr TEXT NOT NULL, "
+                "dateutc INTEGER NOT NULL, "
+                "record TEXT NOT NULL, "
+                "PRIMARY KEY (mac_addr, dateutc)"
+                ") WITHOUT ROWID"
+            )
+
+    def __repr__(self):
+        return f"WxObservationStore({self.path})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def latest(self, mac_addr, count=1):
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT dateutc FROM observations WHERE mac_addr = ? "
+                "ORDER BY dateutc DESC LIMIT ?",
+                (mac_addr, count),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def last_dateutc(self, mac_addr):
+        latest = self.latest(mac_addr)
+        return latest[0] if latest else None
+
+    def write(self, mac_addr, frame):
+        rows = [(mac_addr, record["dateutc"], json.dumps(record)) for record in frame.to_records()]
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO observations (mac_addr, dateutc, record) VALUES (?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def read(self, mac_addr, start_ms=None, end_ms=None):
+        query = "SELECT record FROM observations WHERE mac_addr = ?"
+        params = [mac_addr]
+        if start_ms is not None:
+            query += " AND dateutc >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            query += " AND dateutc < ?"
+            params.append(end_ms)
+        query += " ORDER BY dateutc DESC"
+        with self.__lock:
+            rows = self.__connection.execute(query, params).fetchall()
+        return WxObservationFrame.from_records([json.loads(row[0]) for row in rows])
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from ambient_wx.frame import WxObservationFrame
+
+STEP = 300000
+HOUR = 3600000
+START = 1711929600000
+LATEST = 1515436500000
+
+
+def observation(dateutc, **fields):
+    return {
+        "dateutc": dateutc,
+        "date": str(np.datetime64(dateutc, "ms")) + "Z",
+        "tempf": 60.0 + (dateutc - START) / STEP,
+        **fields,
+    }
+
+
+class PagedGet:
+    def __init__(self, dateutcs, record=observation):
+        self.dateutcs = sorted(dateutcs, reverse=True)
+        self.record = record
+        self.calls = []
+
+    def __call__(self, endpoint=None, params=None, stream=False):
+        self.calls.append(dict(params))
+        end_ms = float("inf")
+        if "endDate" in params:
+            end_ms = datetime.fromisoformat(params["endDate"]).timestamp() * 1000
+        page = [dateutc for dateutc in self.dateutcs if dateutc <= end_ms][: params["limit"]]
+        records = [self.record(dateutc) for dateutc in page]
+        response = MagicMock(headers={"content-type": "application/json"}, status_code=200)
+        response.json.return_value = records
+        response.content = json.dumps(records).encode()
+        return response
+
+
+def make_frame(dateutcs, **columns):
+    if isinstance(dateutcs, int):
+        dateutcs = [START + STEP * index for index in range(dateutcs)]
+    defaults = {"humidity": 40, "tz": "America/New_York"}
+    records = []
+    for index, dateutc in enumerate(dateutcs):
+        record = {"dateutc": dateutc, "date": str(np.datetime64(dateutc, "ms")) + "Z"}
+        record["tempf"] = 60.0 + index
+        for name, value in {**defaults, **columns}.items():
+            record[name] = value[index] if isinstance(value, (list, tuple)) else value
+        records.append(record)
+    return WxObservationFrame.from_records(records)
+
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import ambient_wx
+from ambient_wx.aio import (
+    AsyncWxDeviceCollection,
+    AsyncWxObservationCollection,
+    gather_observations,
+)
+from ambient_wx.ambient_wx import AmbientApi
+from ambient_wx.api import ApiSession
+from ambient_wx.tests.helpers import LATEST, STEP, observation
+
+class StubAmbientHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(0.05)
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/v1/devices":
+            body = [
+                {"macAddress": mac, "info": {"name": mac}, "lastData": observation(LATEST)}
+                for mac in ("AA", "BB")
+            ]
+        else:
+            limit = int(params["limit"][0])
+            latest = LATEST
+            if "endDate" in params:
+                latest = int(datetime.fromisoformat(params["endDate"][0]).timestamp() * 1000)
+            body = [observation(latest - STEP * index) for index in range(limit)]
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with server.lock:
+            server.active -= 1
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAmbientHandler)
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_api(stub_server):
+    host, port = stub_server.server_address
+    session = ApiSession(pool_maxsize=3)
+    with AmbientApi(
+        "123", "456", base_url=f"http://{host}:{port}", session=session, rate_limit=False
+    ) as api:
+        yield api
+
+
+def test_package_import_is_lazy():
+    code = (
+        "import sys, ambient_wx; "
+        "assert 'asyncio' not in sys.modules and 'ambient_wx.realtime' not in sys.modules; "
+        "assert ambient_wx.AsyncWxObservationCollection.__module__ == 'ambient_wx.aio'"
+    )
+    src = os.path.dirname(os.path.dirname(ambient_wx.__file__))
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PYTHONPATH": src})
+
+
+class TestAsyncCollections:
+
+    def test_get_devices(self, stub_api):
+        devices = AsyncWxDeviceCollection(stub_api)
+        asyncio.run(devices.get_devices())
+        assert [device.mac_addr for device in devices.devices] == ["AA", "BB"]
+
+    def test_gather_observations_bounded_by_pool(self, stub_api, stub_server):
+        collections = [
+            AsyncWxObservationCollection(stub_api, mac_addr=str(index)) for index in range(8)
+        ]
+        asyncio.run(gather_observations(collections, limit=5))
+        assert all(len(collection.data) == 5 for collection in collections)
+        assert 1 < stub_server.max_active <= 3
+
+    def test_iter_observations(self, stub_api):
+        collection = AsyncWxObservationCollection(stub_api, mac_addr="AA")
+        start = datetime.fromtimestamp((LATEST - STEP * 9) / 1000, tz=timezone.utc)
+
+        async def collect():
+            return [batch async for batch in collection.iter_observations(start, limit=4)]
+
+        batches = asyncio.run(collect())
+        assert sum(len(batch) for batch in batches) == 10
+
+    def test_backfill(self, stub_api):
+        collection = AsyncWxObservationCollection(stub_api, mac_addr="AA")
+        start = datetime.fromtimestamp((LATEST - STEP * 6) / 1000, tz=timezone.utc)
+        asyncio.run(collection.backfill(start, limit=4))
+        assert len(collection.data) == 7
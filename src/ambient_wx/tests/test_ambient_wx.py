@@ -1,7 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import pytest
+import responses
 
 from ambient_wx.ambient_wx import (
     AmbientApi,
@@ -10,6 +12,8 @@ from ambient_wx.ambient_wx import (
     WxObservation,
     WxObservationCollection,
 )
+from ambient_wx.store import WxObservationStore
+from ambient_wx.tests.helpers import LATEST, STEP, PagedGet
 
 
 @pytest.fixture(scope='class')
@@ -26,6 +30,29 @@ class TestAmbientApi:
         assert api.application_key == "345"
         assert api.api_url == "http://www.example.com/v2"
 
+    def test_session_shared_between_collections(self, api):
+        devices = WxDeviceCollection(api)
+        obs_coll = WxObservationCollection(api, mac_addr="123")
+        assert devices.session is api.session
+        assert obs_coll.session is api.session
+        obs_coll = WxObservationCollection(api, mac_addr="123", retry_total=2)
+        assert obs_coll.session is not api.session
+        assert obs_coll.session.retry_total == 2
+
+    def test_rate_limiter_shared_between_collections(self, api):
+        devices = WxDeviceCollection(api)
+        obs_coll = WxObservationCollection(api, mac_addr="123")
+        assert devices.rate_limiter is api.rate_limiter
+        assert obs_coll.rate_limiter is api.rate_limiter
+        assert AmbientApi("123", "345").rate_limiter is api.rate_limiter
+        assert AmbientApi("123", "345", rate_limit=False).rate_limiter is None
+
+    def test_context_manager_closes_session(self):
+        with AmbientApi("123", "345") as api:
+            api.session.session
+            assert not api.session.closed
+        assert api.session.closed
+
 
 class TestWxDevice:
 
@@ -117,6 +144,29 @@ class TestWxObservation:
         assert obs.tempf.units == "degree_Fahrenheit"
         assert obs.some_other_field == self.data[0]["some_other_field"]
 
+    def test_compact_and_lazy(self):
+        obs = WxObservation(**self.data[0])
+        assert not hasattr(obs, "__dict__")
+        assert obs._date == self.data[0]["date"]
+        assert obs._tempf == self.data[0]["tempf"]
+        assert obs.tempf.magnitude == self.data[0]["tempf"]
+        assert obs._tempf is obs.tempf
+        assert obs.hourlyrainin.magnitude == 0
+        assert isinstance(obs.date, datetime)
+        with pytest.raises(AttributeError):
+            obs.not_a_field
+
+    def test_missing_fields_and_set_units(self):
+        obs = WxObservation(dateutc=1515436500000, date="2018-01-08T18:35:00.000Z", temp1f=70.1)
+        assert obs.tempf is None
+        obs.set_units("temp1f", "degF")
+        assert obs.temp1f.units == "degree_Fahrenheit"
+        obs = WxObservation(**self.data[0])
+        obs.set_units("windspeedmph", "kph")
+        assert obs.windspeedmph.units == "kilometer_per_hour"
+        obs.tempf = None
+        assert obs.tempf is None
+
 
 def mocked_device_response():
     response = MagicMock(headers={'content-type': 'application/json'}, status_code=200)
@@ -218,6 +268,17 @@ class TestWxObservationCollection:
         obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
         obs_coll.get_observations()
         assert len(obs_coll.data) == 1
+        assert obs_coll.data[0].tempf.magnitude == 66.9
+        assert obs_coll.data[0].some_other_field == 2
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', return_value=mocked_observations_response())
+    def test_get_observations_fields(self, _mock_response, api):
+        obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+        obs_coll.get_observations(fields=["tempf", "humidity"])
+        assert obs_coll.data.fields == ["dateutc", "date", "tempf", "humidity"]
+        assert obs_coll.data[0].tempf.magnitude == 66.9
+        df = obs_coll.to_dataframe(fields=["tempf"], units={"tempf": "degC"})
+        assert list(df.columns) == ["dateutc", "date", "tempf"]
 
     @patch('ambient_wx.api.ApiRequestHandler.get', return_value=mocked_observations_response())
     def test_to_dataframe(self, _mock_response, api):
@@ -225,3 +286,111 @@ class TestWxObservationCollection:
         obs_coll.get_observations()
         df = obs_coll.to_dataframe()
         assert df.shape[0] == 1
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', return_value=mocked_observations_response())
+    def test_write_csv(self, _mock_response, api, tmp_path):
+        obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+        filepath = tmp_path / "obs.csv"
+        obs_coll.write_csv(filepath)
+        assert filepath.read_text().strip() == ''
+        obs_coll.get_observations()
+        obs_coll.write_csv(filepath, index="dateutc")
+        df = pd.read_csv(filepath, index_col="dateutc")
+        assert df.shape[0] == 1
+        assert df["tempf"].iloc[0] == 66.9
+
+    def test_iter_observations(self, api):
+        dateutcs = [LATEST - STEP * index for index in range(11)]
+        start = datetime.fromtimestamp(dateutcs[9] / 1000, tz=timezone.utc)
+        with patch(
+            'ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet(dateutcs)
+        ) as mock_get:
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            batches = list(obs_coll.iter_observations(start, limit=5))
+        assert [len(batch) for batch in batches] == [5, 4, 1]
+        assert mock_get.call_count == 3
+        assert "endDate" not in mock_get.call_args_list[0].kwargs["params"]
+        end_date = mock_get.call_args_list[1].kwargs["params"]["endDate"]
+        assert datetime.fromisoformat(end_date).timestamp() * 1000 == dateutcs[4]
+        dates = [row.dateutc for batch in batches for row in batch]
+        assert dates == dateutcs[:10]
+
+    def test_backfill(self, api):
+        dateutcs = [LATEST - STEP * index for index in range(8)]
+        start = datetime(2018, 1, 1)
+        with patch('ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet(dateutcs)):
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            obs_coll.backfill(start, limit=5)
+        assert list(obs_coll.data.columns["dateutc"]) == dateutcs
+
+        batches = []
+        with patch('ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet(dateutcs)):
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            obs_coll.backfill(start, limit=5, sink=batches.append)
+        assert obs_coll.data is None
+        assert sum(len(batch) for batch in batches) == len(dateutcs)
+
+    def test_backfill_empty_range(self, api, tmp_path):
+        start = datetime.fromtimestamp((LATEST + STEP) / 1000, tz=timezone.utc)
+        with patch('ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet([LATEST])):
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            assert list(obs_coll.iter_observations(start)) == []
+            obs_coll.backfill(start)
+        assert len(obs_coll.data) == 0
+        assert obs_coll.data.columns["dateutc"].dtype == "int64"
+        assert obs_coll.to_dataframe(index="dateutc").empty
+        assert len(obs_coll.write_archive(tmp_path / "archive")) == 0
+        pytest.importorskip("pyarrow")
+        obs_coll.write_parquet(tmp_path / "parquet")
+
+    def test_sync_and_load(self, api, tmp_path):
+        now = int(datetime.now(timezone.utc).timestamp() * 1000)
+        dateutcs = [now - STEP * index for index in range(10)]
+        with WxObservationStore(tmp_path / "observations.db") as store:
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            with patch('ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet(dateutcs[2:])):
+                assert obs_coll.sync(store, limit=8) == 8
+            with patch(
+                'ambient_wx.api.ApiRequestHandler.get', side_effect=PagedGet(dateutcs)
+            ) as mock_get:
+                assert obs_coll.sync(store) == 2
+            assert mock_get.call_args_list[0].kwargs["params"]["limit"] == 3
+            obs_coll.load(store)
+            assert list(obs_coll.data.columns["dateutc"]) == dateutcs
+            start = datetime.fromtimestamp(dateutcs[5] / 1000, tz=timezone.utc)
+            end = datetime.fromtimestamp(dateutcs[1] / 1000, tz=timezone.utc)
+            obs_coll.load(store, start=start, end=end)
+            assert list(obs_coll.data.columns["dateutc"]) == dateutcs[2:6]
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', return_value=mocked_observations_response())
+    def test_unit_conversion(self, _mock_response, api):
+        obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+        obs_coll.get_observations()
+        df = obs_coll.to_dataframe(units="SI")
+        assert df.attrs["units"]["baromrelin"] == "hectopascal"
+        obs_coll.to_units({"tempf": "degC"})
+        assert obs_coll.data[0].tempf.units == "degree_Celsius"
+        obs_coll.to_system("SI")
+        assert obs_coll.data[0].windspeedmph.units == "meter / second"
+
+    def test_get_observations_stream(self):
+        api = AmbientApi("123", "345", base_url="http://www.example.com", rate_limit=False)
+        records = mocked_observations_response().json.return_value * 5
+        with responses.RequestsMock() as rsps:
+            rsps.add(
+                responses.GET,
+                "http://www.example.com/v1/devices/123",
+                json=records,
+                status=200,
+            )
+            obs_coll = WxObservationCollection(api, mac_addr=self.mac_addr)
+            obs_coll.stream_chunk_size = 64
+            obs_coll.get_observations(stream=True, batch_size=2)
+            assert len(obs_coll.data) == 5
+            assert obs_coll.raw_data is None
+            assert obs_coll.data[4].some_other_field == 2
+            obs_coll.get_observations(stream=True, keep_raw=True)
+            assert obs_coll.raw_data == records
+            obs_coll.get_observations(json_backend="json", keep_raw=False)
+            assert len(obs_coll.data) == 5
+            assert obs_coll.raw_data is None
@@ -1,8 +1,10 @@
+from unittest.mock import MagicMock
+
 import pytest
 import requests
 import responses
 
-from ambient_wx.api import ApiRequestHandler
+from ambient_wx.api import ApiRequestHandler, ApiSession
 
 
 class TestApiRequestHandler:
@@ -43,3 +45,34 @@ class TestApiRequestHandler:
                 )
             with pytest.raises((requests.exceptions.RetryError, SystemExit)):
                 api.get(self.endpoint)
+
+    def test_session_reused_between_requests(self):
+        api = ApiRequestHandler(self.root_url)
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, self.url, body="{}", status=200)
+            api.get(self.endpoint)
+            session = api.session.session
+            api.get(self.endpoint)
+            assert api.session.session is session
+            assert len(rsps.calls) == 2
+            assert "gzip" in rsps.calls[0].request.headers["Accept-Encoding"]
+        api.close()
+        assert api.session.closed
+
+    def test_shared_session_not_closed_by_handler(self):
+        with ApiSession(pool_maxsize=4, timeout=(2, 5)) as session:
+            adapter = session.session.get_adapter(self.url)
+            assert adapter.timeout == (2, 5)
+            assert adapter._pool_maxsize == 4
+            with ApiRequestHandler(self.root_url, session=session) as api:
+                assert api.session is session
+            assert not session.closed
+        assert session.closed
+
+    def test_rate_limiter_acquired_before_request(self):
+        limiter = MagicMock()
+        api = ApiRequestHandler(self.root_url, rate_limiter=limiter)
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, self.url, body="{}", status=200)
+            api.get(self.endpoint)
+        limiter.acquire.assert_called_once()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import numpy as np
+
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.archive import WxArchive
+from ambient_wx.frame import WxObservationFrame
+from ambient_wx.tests.helpers import START, STEP, make_frame
+
+
+class TestWxArchive:
+
+    def test_write_and_slice(self, tmp_path):
+        dateutcs = [START + STEP * index for index in range(10)]
+        archive = WxArchive.write(tmp_path, make_frame(dateutcs[::-1]))
+        assert len(archive) == 10
+        assert "tz" not in archive.columns
+        assert archive.dtypes["humidity"] == np.float64
+        assert isinstance(archive.columns["tempf"], np.memmap)
+        frame = archive.slice(START + STEP * 2, START + STEP * 5)
+        assert list(frame.columns["dateutc"]) == dateutcs[2:5]
+        assert np.shares_memory(frame.columns["tempf"], archive.columns["tempf"])
+        assert frame[0].tempf.units == "degree_Fahrenheit"
+        assert frame[0].date == datetime(2024, 4, 1, 0, 10)
+        frame = archive.slice(fields=["tempf"])
+        assert list(frame.columns) == ["dateutc", "date", "tempf"]
+        assert len(frame) == 10
+
+    def test_append_newer_rows(self, tmp_path):
+        WxArchive.write(tmp_path, make_frame([START, START + STEP]))
+        size = (tmp_path / "tempf.bin").stat().st_size
+        archive = WxArchive.write(tmp_path, make_frame([START + STEP * 3, START + STEP * 2]))
+        assert (tmp_path / "tempf.bin").stat().st_size == size * 2
+        assert list(archive.columns["dateutc"]) == [START + STEP * index for index in range(4)]
+        assert len(WxArchive.write(tmp_path, WxObservationFrame())) == 4
+
+    def test_append_after_interrupted_write(self, tmp_path):
+        WxArchive.write(tmp_path, make_frame([START, START + STEP]))
+        for name in ("dateutc", "tempf"):
+            with open(tmp_path / f"{name}.bin", "ab") as f:
+                f.write(np.zeros(3).tobytes())
+        archive = WxArchive.write(tmp_path, make_frame([START + STEP * 2], tempf=70.0))
+        assert (tmp_path / "tempf.bin").stat().st_size == 3 * 8
+        assert list(archive.columns["dateutc"]) == [START + STEP * index for index in range(3)]
+        assert list(archive.columns["tempf"]) == [60.0, 61.0, 70.0]
+
+    def test_merge_overlapping_rows_and_new_fields(self, tmp_path):
+        WxArchive.write(tmp_path, make_frame([START, START + STEP * 2]))
+        archive = WxArchive.write(
+            tmp_path, make_frame([START + STEP * 2, START + STEP], soilhum1=20)
+        )
+        assert list(archive.columns["dateutc"]) == [START, START + STEP, START + STEP * 2]
+        assert np.isnan(archive.columns["soilhum1"][0])
+        assert archive.columns["soilhum1"][2] == 20
+        assert archive.columns["tempf"][2] == 60.0
+
+    def test_collection(self, tmp_path):
+        api = AmbientApi("123", "345", rate_limit=False)
+        obs_coll = WxObservationCollection(api, mac_addr="AA")
+        obs_coll.data = make_frame([START + STEP * index for index in range(6)])
+        obs_coll.write_archive(tmp_path)
+        obs_coll.load_archive(tmp_path, start=datetime(2024, 4, 1, 0, 10))
+        assert len(obs_coll.data) == 4
+        assert obs_coll.to_dataframe().shape[0] == 4
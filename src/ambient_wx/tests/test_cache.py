@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+import requests
+import responses
+
+from ambient_wx.ambient_wx import AmbientApi, WxDeviceCollection
+from ambient_wx.api import ApiRequestError
+from ambient_wx.cache import ResponseCache, SQLiteCacheBackend, cache_key
+
+DEVICES = [
+    {
+        "macAddress": "00:00:00:00:00:00",
+        "lastData": {"dateutc": 1515436500000, "date": "2018-01-08T18:35:00.000Z", "tempf": 1},
+        "info": {"name": "Home"},
+    }
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_response(content=b"[]"):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = content
+    return response
+
+
+class TestResponseCache:
+
+    def test_cache_key_hashes_credentials(self):
+        key = cache_key("http://example.com/v1/devices", {"apiKey": "secret", "limit": 5})
+        assert "secret" not in key
+        assert key == cache_key("http://example.com/v1/devices", {"limit": 5, "apiKey": "secret"})
+        assert key != cache_key("http://example.com/v1/devices", {"apiKey": "other", "limit": 5})
+
+    def test_ttl_and_lru(self):
+        clock = Clock()
+        cache = ResponseCache(ttl=60, maxsize=2, clock=clock)
+        calls = []
+
+        def fetch(content):
+            calls.append(content)
+            return make_response(content)
+
+        assert cache.get("a", lambda: fetch(b"[1]")).json() == [1]
+        assert cache.get("a", lambda: fetch(b"[2]")).json() == [1]
+        cache.get("b", lambda: fetch(b"[3]"))
+        cache.get("a", lambda: fetch(b"[4]"))
+        cache.get("c", lambda: fetch(b"[5]"))
+        assert len(cache) == 2
+        assert cache.get("b", lambda: fetch(b"[6]")).json() == [6]
+        clock.now = 61
+        assert cache.get("c", lambda: fetch(b"[7]")).json() == [7]
+        assert calls == [b"[1]", b"[3]", b"[5]", b"[6]", b"[7]"]
+        assert (cache.hits, cache.misses) == (2, 5)
+
+    def test_single_flight(self):
+        cache = ResponseCache()
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return make_response(b'{"ok": true}')
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("key", fetch).json()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [{"ok": True}] * 8
+
+    def test_errors_are_shared_and_not_cached(self):
+        cache = ResponseCache()
+        release = threading.Event()
+
+        def failing():
+            release.wait()
+            raise ApiRequestError("API Error 500")
+
+        errors = []
+
+        def call():
+            try:
+                cache.get("key", failing)
+            except ApiRequestError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(errors) == 3
+        assert cache.get("key", make_response).json() == []
+
+    def test_sqlite_backend_is_shared(self, tmp_path):
+        first = ResponseCache(backend=SQLiteCacheBackend(tmp_path / "cache.db"))
+        second = ResponseCache(backend=SQLiteCacheBackend(tmp_path / "cache.db"))
+        first.get("key", lambda: make_response(b"[1]"))
+        response = second.get("key", lambda: pytest.fail("should be served from the backend"))
+        assert response.json() == [1]
+        assert response.headers["content-type"] == "application/json"
+        second.clear()
+        assert first.backend.get("key") is None
+
+
+class TestHandlerCache:
+
+    def test_get_devices_is_cached(self):
+        api = AmbientApi(
+            "123", "345", base_url="http://www.example.com", rate_limit=False, cache=ResponseCache()
+        )
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "http://www.example.com/v1/devices", json=DEVICES)
+            for _ in range(3):
+                collection = WxDeviceCollection(api)
+                collection.get_devices()
+                assert collection.devices[0].data.tempf.magnitude == 1
+            assert len(rsps.calls) == 1
+
+    def test_credentials_are_not_stored(self, tmp_path):
+        path = tmp_path / "cache.db"
+        cache = ResponseCache(backend=SQLiteCacheBackend(path))
+        api = AmbientApi(
+            "SECRETAPI", "SECRETAPP", base_url="http://x.test", rate_limit=False, cache=cache
+        )
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "http://x.test/v1/devices", json=DEVICES)
+            WxDeviceCollection(api).get_devices()
+            assert "SECRETAPI" in rsps.calls[0].request.url
+        cache.backend.close()
+        content = path.read_bytes()
+        assert b"SECRETAPI" not in content and b"SECRETAPP" not in content
+        with sqlite3.connect(path) as connection:
+            urls = connection.execute("SELECT url FROM responses").fetchall()
+        assert urls == [("http://x.test/v1/devices",)]
@@ -0,0 +1,124 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ambient_wx.ambient_wx import AmbientApi
+from ambient_wx.cli import main
+from ambient_wx.daemon import CsvSink, WxSyncDaemon, make_sink
+from ambient_wx.frame import WxObservationFrame
+from ambient_wx.store import WxObservationStore
+from ambient_wx.tests.helpers import STEP, PagedGet
+
+MAC = "00:00:00:00:00:00"
+
+
+def recent(count):
+    latest = int(time.time() * 1000) // STEP * STEP
+    return [latest - STEP * index for index in range(count)]
+
+
+class TestWxSyncDaemon:
+
+    def setup_method(self):
+        self.api = AmbientApi("x", "y", base_url="http://www.example.com", rate_limit=False)
+
+    def test_next_poll(self):
+        daemon = WxSyncDaemon(self.api, None, default_cadence=300, margin=30, max_backoff=900)
+        assert daemon.next_poll([1_000_000, 940_000], 0, 900) == 1000 + 60 + 30
+        assert daemon.next_poll([1_000_000], 0, 900) == 1000 + 300 + 30
+        assert daemon.next_poll([1_000_000, 940_000], 0, 5000) == 5000 + 60
+        assert daemon.next_poll([1_000_000, 940_000], 3, 5000) == 5000 + 480
+        assert daemon.next_poll([1_000_000, 940_000], 10, 5000) == 5000 + 900
+
+    def test_run_once_and_skip_until_new_data(self, tmp_path):
+        dateutcs = recent(6)
+        get = PagedGet(dateutcs)
+        daemon = WxSyncDaemon(
+            self.api, WxObservationStore(tmp_path / "wx.db"), mac_addrs=[MAC], margin=30
+        )
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=get):
+            daemon.run(once=True)
+            assert daemon.next_polls[MAC] == dateutcs[0] / 1000 + STEP / 1000 + 30
+            assert daemon.misses[MAC] == 0
+            assert len(get.calls) == 1
+            daemon = WxSyncDaemon(
+                self.api, WxObservationStore(tmp_path / "wx.db"), mac_addrs=[MAC], margin=30
+            )
+            daemon.run(once=True)
+            assert len(get.calls) == 1
+        with WxObservationStore(tmp_path / "wx.db") as store:
+            assert store.latest(MAC, count=10) == dateutcs
+
+    def test_errors_back_off(self, tmp_path):
+        store = WxObservationStore(tmp_path / "wx.db")
+        clock = MagicMock(return_value=1000.0)
+        daemon = WxSyncDaemon(
+            self.api, store, mac_addrs=[MAC], default_cadence=60, max_backoff=600, clock=clock
+        )
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=RuntimeError("down")):
+            daemon.run(once=True)
+        assert isinstance(daemon.errors[MAC], RuntimeError)
+        assert daemon.next_polls[MAC] == 1000 + 120
+
+    def test_stop(self, tmp_path):
+        dateutcs = recent(2)
+        store = WxObservationStore(tmp_path / "wx.db")
+        store.write(MAC, WxObservationFrame.from_records([{"dateutc": d} for d in dateutcs]))
+        daemon = WxSyncDaemon(self.api, store, mac_addrs=[MAC], margin=3600)
+        thread = threading.Thread(target=daemon.run)
+        thread.start()
+        time.sleep(0.2)
+        daemon.stop()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+class TestSinks:
+
+    def test_csv_sink(self, tmp_path):
+        sink = CsvSink(tmp_path)
+        assert sink.latest(MAC) == []
+        frame = WxObservationFrame.from_records(
+            [{"dateutc": 3, "tempf": 1.0}, {"dateutc": 2, "tempf": 2.0}, {"dateutc": 1}]
+        )
+        assert sink.write(MAC, frame) == 3
+        sink.write(MAC, WxObservationFrame.from_records([{"dateutc": 4, "humidity": 5}]))
+        assert sink.latest(MAC, count=2) == [4, 3]
+        assert (tmp_path / "000000000000.csv").read_text().splitlines() == [
+            "dateutc,tempf,humidity",
+            "1,,",
+            "2,2.0,",
+            "3,1.0,",
+            "4,,5",
+        ]
+        assert CsvSink(tmp_path).latest(MAC, count=2) == [4, 3]
+
+    def test_csv_sink_reads_tail(self, tmp_path):
+        sink = CsvSink(tmp_path)
+        records = [{"dateutc": dateutc, "tempf": 50.0} for dateutc in range(20000, 0, -1)]
+        sink.write(MAC, WxObservationFrame.from_records(records))
+        assert (tmp_path / "000000000000.csv").stat().st_size > 65536
+        assert CsvSink(tmp_path).latest(MAC, count=2) == [20000, 19999]
+        (tmp_path / "111111111111.csv").write_text("dateutc,tempf\n7,1.0\n")
+        assert CsvSink(tmp_path).latest("11:11:11:11:11:11", count=2) == [7]
+
+    def test_make_sink(self, tmp_path):
+        assert isinstance(make_sink("csv", tmp_path), CsvSink)
+        with pytest.raises(ValueError):
+            make_sink("excel", tmp_path)
+
+
+class TestCli:
+
+    def test_sync_once(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("AMBIENT_API_KEY", raising=False)
+        args = ["sync", "--sink", "csv", "--path", str(tmp_path), "--mac", MAC, "--once"]
+        with pytest.raises(SystemExit):
+            main(args)
+        get = PagedGet(recent(3))
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=get):
+            assert main([*args, "--api-key", "x", "--application-key", "y"]) == 0
+        assert len(get.calls) == 1
+        assert len((tmp_path / "000000000000.csv").read_text().splitlines()) == 4
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from ambient_wx import derived
+from ambient_wx.tests.helpers import make_frame
+
+
+class TestDerived:
+
+    def test_heat_index(self):
+        frame = make_frame(4, tempf=[96, 70, 84, 100], humidity=[65, 50, 90, 10])
+        hi = derived.heat_index(frame)["heat_index"]
+        assert str(hi.units) == "degree_Fahrenheit"
+        assert hi.magnitude[0] == pytest.approx(121.0, abs=1)
+        assert hi.magnitude[1] == pytest.approx(69.0, abs=1)
+        assert hi.magnitude[2] == pytest.approx(98.0, abs=1)
+        assert hi.magnitude[3] == pytest.approx(95.0, abs=1.5)
+
+    def test_wind_chill(self):
+        frame = make_frame(3, tempf=[5, 60, 30], windspeedmph=[20, 20, 1])
+        wc = derived.wind_chill(frame)["wind_chill"].magnitude
+        assert wc[0] == pytest.approx(-15.4, abs=0.1)
+        assert np.isnan(wc[1]) and np.isnan(wc[2])
+
+    def test_vapor_pressure(self):
+        frame = make_frame(1, dewPoint=[50.0])
+        e = derived.vapor_pressure(frame)["vapor_pressure"]
+        assert e.to("hPa").magnitude[0] == pytest.approx(12.28, abs=0.05)
+
+    def test_sea_level_pressure(self):
+        frame = make_frame(1, baromabsin=[28.71], tempf=[59.0])
+        with pytest.raises(ValueError):
+            derived.sea_level_pressure(frame)
+        slp = derived.sea_level_pressure(frame, elevation=350)["sea_level_pressure"]
+        assert slp.magnitude[0] == pytest.approx(1013.8, abs=1)
+
+    def test_wind_components(self):
+        frame = make_frame(2, windspeedmph=[10, 10], winddir=[0, 270])
+        components = derived.wind_components(frame)
+        assert components["wind_u"].magnitude == pytest.approx([0, 10], abs=1e-9)
+        assert components["wind_v"].magnitude == pytest.approx([-10, 0], abs=1e-9)
+
+    def test_rain_rate(self):
+        frame = make_frame(4, dailyrainin=[0.0, 0.1, 0.3, 0.05])
+        frame = frame[::-1]
+        rate = derived.rain_rate(frame)["rain_rate"]
+        assert str(rate.units) == "inch / hour"
+        assert np.isnan(rate.magnitude[3])
+        assert list(rate.magnitude[:3]) == pytest.approx([0.6, 2.4, 1.2])
+
+    def test_to_dataframe(self):
+        frame = make_frame(2, tempf=[40.0, 41.0], windspeedmph=[10, 12], winddir=[90, 180])
+        df = frame.to_dataframe(derived=["wind_chill", "wind_components"])
+        assert {"wind_chill", "wind_u", "wind_v"} <= set(df.columns)
+        assert df.attrs["units"]["wind_chill"] == "degree_Fahrenheit"
+        df = frame.to_dataframe(derived=["wind_chill"], units={"wind_chill": "degC"})
+        assert df["wind_chill"].iloc[0] == pytest.approx(0.91, abs=0.05)
+        with pytest.raises(ValueError):
+            frame.to_dataframe(derived=["dew"])
@@ -0,0 +1,61 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from ambient_wx.ambient_wx import AmbientApi, WxDevice, WxDeviceCollection
+from ambient_wx.api import ApiRequestError
+from ambient_wx.fleet import WxFleet
+
+
+def mocked_get(endpoint=None, params=None):
+    if endpoint == "devices":
+        response = MagicMock(status_code=200)
+        response.json.return_value = [
+            {"macAddress": mac_addr, "info": {"name": mac_addr}, "lastData": None}
+            for mac_addr in ("AA", "BB", "BAD")
+        ]
+        return response
+    mac_addr = endpoint.split("/")[-1]
+    if mac_addr == "BAD":
+        raise ApiRequestError("API Error 500")
+    response = MagicMock(status_code=200)
+    response.json.return_value = [
+        {"dateutc": 1515436800000, "date": "2018-01-08T18:40:00.000Z", "tempf": 67.1},
+        {"dateutc": 1515436500000, "date": "2018-01-08T18:35:00.000Z", "tempf": 66.9},
+    ]
+    return response
+
+
+class TestWxFleet:
+
+    def setup_method(self):
+        self.api = AmbientApi("123", "345", base_url="http://www.example.com", rate_limit=False)
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', side_effect=mocked_get)
+    def test_get_observations_reports_failures(self, _mock_get):
+        fleet = WxFleet(WxDeviceCollection(self.api), max_workers=2)
+        fleet.get_observations(limit=2)
+        assert sorted(fleet.collections) == ["AA", "BB"]
+        assert list(fleet.errors) == ["BAD"]
+        assert isinstance(fleet.errors["BAD"], ApiRequestError)
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', side_effect=mocked_get)
+    def test_to_dataframe(self, _mock_get):
+        fleet = WxFleet(WxDeviceCollection(self.api))
+        assert fleet.to_dataframe().empty
+        fleet.get_observations()
+        df = fleet.to_dataframe(units={"tempf": "degC"})
+        assert df.index.names == ["mac_addr", "date"]
+        assert df.shape[0] == 4
+        assert df.loc[("AA", pd.Timestamp("2018-01-08 18:35:00")), "tempf"] > 19
+        assert df.attrs["units"]["tempf"] == "degC"
+
+    @patch('ambient_wx.api.ApiRequestHandler.get', side_effect=mocked_get)
+    def test_backfill(self, mock_get):
+        devices = WxDeviceCollection(self.api)
+        devices.devices = [WxDevice("AA"), WxDevice("BB")]
+        fleet = WxFleet(devices)
+        fleet.backfill(datetime(2018, 1, 8, 18, 35))
+        assert all(len(collection.data) == 2 for collection in fleet.collections.values())
+        assert all(call.kwargs["endpoint"] != "devices" for call in mock_get.call_args_list)
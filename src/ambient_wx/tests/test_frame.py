@@ -0,0 +1,209 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ambient_wx.frame import WxObservationFrame, WxObservationRow
+
+
+class TestWxObservationFrame:
+
+    def setup_method(self):
+        self.records = [
+            {
+                "dateutc": 1515436800000,
+                "date": "2018-01-08T18:40:00.000Z",
+                "tempf": 67.1,
+                "humidity": 31,
+                "hourlyrainin": 0,
+                "loc": "ambient-prod-2",
+            },
+            {
+                "dateutc": 1515436500000,
+                "date": "2018-01-08T18:35:00.000Z",
+                "tempf": 66.9,
+                "humidity": 30,
+                "hourlyrainin": 0,
+                "some_other_field": 2,
+            },
+        ]
+
+    def test_from_records_columns(self):
+        frame = WxObservationFrame.from_records(self.records)
+        assert len(frame) == 2
+        assert frame.columns["dateutc"].dtype == np.int64
+        assert frame.columns["tempf"].dtype == np.float64
+        assert frame.columns["date"].dtype == np.dtype("datetime64[ms]")
+        assert frame.columns["loc"].dtype == object
+        assert np.isnan(frame.columns["some_other_field"][0])
+        assert frame.units["tempf"] == "degF"
+        assert "loc" not in frame.units
+
+    def test_from_records_keeps_non_numeric_values(self):
+        records = [
+            {"dateutc": 1, "station": "07", "battout": True, "tempf": 60},
+            {"dateutc": 2, "station": "08", "battout": False, "tempf": None},
+        ]
+        frame = WxObservationFrame.from_records(records)
+        assert frame.columns["station"].tolist() == ["07", "08"]
+        assert frame.columns["battout"].tolist() == [True, False]
+        assert frame.columns["tempf"].dtype == np.float64
+        assert frame[0].station == "07"
+        assert frame[1].battout is False
+
+    def test_from_records_fields(self):
+        frame = WxObservationFrame.from_records(
+            self.records, fields=["tempf", "some_other_field", "missing"]
+        )
+        assert frame.fields == ["dateutc", "date", "tempf", "some_other_field"]
+        assert frame.units == {"tempf": "degF"}
+        assert np.isnan(frame.columns["some_other_field"][0])
+        assert frame[1].some_other_field == 2
+
+    def test_select_projection(self, tmp_path):
+        frame = WxObservationFrame.from_records(self.records)
+        assert frame.select(["humidity"]).fields == ["dateutc", "date", "humidity"]
+        df = frame.to_dataframe(index="date", fields=["tempf"])
+        assert list(df.columns) == ["dateutc", "date", "tempf"]
+        assert df.attrs["units"] == {"tempf": "degF"}
+        filepath = tmp_path / "obs.csv"
+        frame.write_csv(filepath, fields=["tempf", "humidity"])
+        assert list(pd.read_csv(filepath).columns) == ["dateutc", "date", "tempf", "humidity"]
+
+    def test_frame_without_date(self):
+        frame = WxObservationFrame.from_records(self.records).select(["tempf"])
+        del frame.columns["date"]
+        assert repr(frame[0]) == "WxObservation(dateutc=1515436800000, date=None)"
+        df = frame.to_dataframe(index="date")
+        assert df.index[0] == pd.Timestamp("2018-01-08 18:40:00")
+
+    def test_row_access(self):
+        frame = WxObservationFrame.from_records(self.records)
+        row = frame[1]
+        assert isinstance(row, WxObservationRow)
+        assert row.dateutc == 1515436500000
+        assert row.date == datetime(2018, 1, 8, 18, 35)
+        assert row.tempf.magnitude == 66.9
+        assert row.tempf.units == "degree_Fahrenheit"
+        assert row.hourlyrainin.magnitude == 0
+        assert row.some_other_field == 2
+        assert frame[0].some_other_field is None
+        assert frame[0].loc == "ambient-prod-2"
+        assert frame[-1].dateutc == row.dateutc
+        with pytest.raises(AttributeError):
+            row.not_a_field
+        with pytest.raises(IndexError):
+            frame[2]
+
+    def test_row_missing_fields_and_set_units(self):
+        frame = WxObservationFrame.from_records(self.records)
+        row = frame[0]
+        assert row.windspeedmph is None
+        assert row.some_other_field is None
+        row.set_units("some_other_field", "degF")
+        assert frame[1].some_other_field.units == "degree_Fahrenheit"
+        row.set_units("tempf", "degC")
+        assert frame[1].tempf.units == "degree_Celsius"
+        assert frame[1].tempf.magnitude == 66.9
+        with pytest.raises(KeyError):
+            row.set_units("windspeedmph", "kph")
+
+    def test_iteration_and_slicing(self):
+        frame = WxObservationFrame.from_records(self.records)
+        assert [row.humidity.magnitude for row in frame] == [31, 30]
+        sliced = frame[1:]
+        assert len(sliced) == 1
+        assert np.shares_memory(sliced.columns["tempf"], frame.columns["tempf"])
+
+    def test_to_records_round_trip(self):
+        frame = WxObservationFrame.from_records(self.records)
+        records = frame.to_records()
+        assert records[0]["date"] == "2018-01-08T18:40:00.000Z"
+        assert "some_other_field" not in records[0]
+        assert records[1]["some_other_field"] == 2
+        assert records[1]["tempf"] == 66.9
+        assert WxObservationFrame.from_records(records)[1].date == frame[1].date
+
+    def test_quantity(self):
+        frame = WxObservationFrame.from_records(self.records)
+        tempc = frame.quantity("tempf").to("degC")
+        assert tempc.magnitude[1] == pytest.approx(19.388889, rel=1e-6)
+
+    def test_to_dataframe_shares_memory(self):
+        frame = WxObservationFrame.from_records(self.records)
+        df = frame.to_dataframe()
+        assert df.shape == (2, 7)
+        assert np.shares_memory(df["tempf"].to_numpy(), frame.columns["tempf"])
+
+    def test_to_units(self):
+        frame = WxObservationFrame.from_records(self.records)
+        converted = frame.to_units({"tempf": "degC", "hourlyrainin": "mm"})
+        assert converted.units["tempf"] == "degC"
+        assert converted.columns["tempf"][1] == pytest.approx(19.388889, rel=1e-6)
+        assert frame.columns["tempf"][1] == 66.9
+        assert converted[1].tempf.units == "degree_Celsius"
+        with pytest.raises(ValueError):
+            frame.to_units({"loc": "degC"})
+
+    def test_to_system(self):
+        records = [dict(record, baromrelin=30.0, windspeedmph=10) for record in self.records]
+        frame = WxObservationFrame.from_records(records).to_units("SI")
+        assert frame.units["tempf"] == "degC"
+        assert frame.units["windspeedmph"] == "meter / second"
+        assert frame.units["baromrelin"] == "hectopascal"
+        assert frame.units["humidity"] == "percent"
+        assert frame.columns["baromrelin"][0] == pytest.approx(1015.9166, rel=1e-6)
+        assert frame.columns["windspeedmph"][0] == pytest.approx(4.4704, rel=1e-6)
+        frame = frame.to_units("US")
+        assert frame.columns["tempf"][1] == pytest.approx(66.9)
+        with pytest.raises(ValueError):
+            frame.to_units("imperial")
+
+    def test_to_dataframe_units(self):
+        frame = WxObservationFrame.from_records(self.records)
+        df = frame.to_dataframe(units={"tempf": "degC"})
+        assert df["tempf"].iloc[1] == pytest.approx(19.388889, rel=1e-6)
+        assert df.attrs["units"]["tempf"] == "degC"
+        assert frame.to_dataframe().attrs["units"]["tempf"] == "degF"
+
+    def test_to_dataframe_datetime_index(self):
+        frame = WxObservationFrame.from_records(self.records)
+        df = frame.to_dataframe(index="dateutc")
+        assert str(df.index.tz) == "UTC"
+        assert df.index[1] == pd.Timestamp("2018-01-08T18:35:00", tz="UTC")
+        df = frame.to_dataframe(index="date")
+        assert isinstance(df.index, pd.DatetimeIndex)
+        assert df.index.name == "date"
+        with pytest.raises(ValueError):
+            frame.to_dataframe(index="tempf")
+
+    def test_write_csv_chunks(self, tmp_path):
+        frame = WxObservationFrame.from_records(self.records * 3)
+        filepath = tmp_path / "obs.csv"
+        frame.write_csv(filepath, chunksize=4)
+        df = pd.read_csv(filepath)
+        assert df.shape == (6, 7)
+        assert list(df["tempf"]) == [67.1, 66.9] * 3
+
+    def test_concat(self):
+        first = WxObservationFrame.from_records(self.records[:1])
+        second = WxObservationFrame.from_records(self.records[1:])
+        frame = WxObservationFrame.concat([first, WxObservationFrame(), second])
+        assert len(frame) == 2
+        assert list(frame.columns["dateutc"]) == [1515436800000, 1515436500000]
+        assert frame[0].some_other_field is None
+        assert frame[1].loc is None
+        assert frame[1].date == datetime(2018, 1, 8, 18, 35)
+        assert len(WxObservationFrame.concat([])) == 0
+
+    def test_mismatched_columns(self):
+        with pytest.raises(ValueError):
+            WxObservationFrame({"a": np.zeros(2), "b": np.zeros(3)})
+
+    def test_empty(self):
+        frame = WxObservationFrame.from_records([])
+        assert len(frame) == 0
+        assert frame.to_dataframe().empty
+        assert frame.columns["dateutc"].dtype == np.int64
+        assert WxObservationFrame.concat([]).to_dataframe(index="dateutc").empty
@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.gaps import WxGapIndex
+from ambient_wx.tests.helpers import START, STEP, PagedGet, make_frame
+
+
+class TestWxGapIndex:
+
+    def test_gaps(self):
+        present = [0, 1, 2, 5, 6, 7, 8, 20, 21]
+        index = WxGapIndex([START + STEP * i for i in present][::-1])
+        assert index.cadence == STEP
+        assert list(index) == [
+            (START + STEP * 2, START + STEP * 5),
+            (START + STEP * 8, START + STEP * 20),
+        ]
+        assert index.missing() == 2 + 11
+        assert index.between(START + STEP * 10, None) == [(START + STEP * 8, START + STEP * 20)]
+        assert index.between(None, START + STEP * 3) == [(START + STEP * 2, START + STEP * 5)]
+        mask = index.contains([START + STEP * i for i in [1, 2, 3, 4, 5, 9, 21]])
+        assert list(mask) == [False, False, True, True, False, True, False]
+        assert len(WxGapIndex([START])) == 0
+        assert not WxGapIndex([]).contains([START]).any()
+
+    def test_plan(self):
+        index = WxGapIndex([START + STEP * i for i in [0, 1, 2, 5, 6, 7, 8, 20, 400, 401]])
+        plan = index.plan(limit=288)
+        assert plan[0] == (START + STEP * 400, 288, START + STEP * 20)
+        assert plan[1] == (START + STEP * 20, 19, START + STEP * 2)
+        assert len(index.plan(limit=10)) == 3
+
+
+def steps(indexes):
+    return [START + STEP * index for index in indexes]
+
+
+class TestRepair:
+
+    def setup_method(self):
+        api = AmbientApi(api_key="x", application_key="y", rate_limit=False)
+        self.collection = WxObservationCollection(api, mac_addr="00:00:00:00:00:00")
+
+    def test_repair_fills_only_gaps(self):
+        collection = self.collection
+        collection.data = make_frame(steps([0, 1, 2, 5, 6, 7, 8, 20, 21])[::-1])
+        get = PagedGet(steps(range(22)))
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=get):
+            assert collection.repair(limit=10) == 13
+        assert [call["limit"] for call in get.calls] == [10, 4, 4]
+        dateutc = collection.data.columns["dateutc"]
+        assert list(dateutc) == steps(range(21, -1, -1))
+        assert len(collection.find_gaps()) == 0
+        assert collection.data[0].tempf.magnitude == 60.0
+
+    def test_repair_sink_and_unfillable_gap(self):
+        collection = self.collection
+        collection.data = make_frame(steps([0, 1, 6, 7])[::-1])
+        get = PagedGet(steps([0, 1, 6, 7]))
+        batches = []
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=get):
+            assert collection.repair(sink=batches.append) == 0
+        assert len(get.calls) == 1
+        assert batches == []
+        assert len(collection.data) == 4
+        assert np.all(np.diff(collection.data.columns["dateutc"]) < 0)
+
+    def test_repair_sink_receives_rows(self):
+        collection = self.collection
+        collection.data = make_frame(steps([0, 1, 6, 7])[::-1])
+        batches = []
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=PagedGet(steps(range(8)))):
+            assert collection.repair(sink=batches.append) == 4
+        assert sum(len(batch) for batch in batches) == 4
+        assert len(collection.data) == 4
+
+    def test_repair_without_data(self):
+        collection = self.collection
+        gaps = WxGapIndex(steps([0, 1, 6, 7]))
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=PagedGet(steps(range(8)))):
+            assert collection.repair(gaps) == 4
+        assert list(collection.data.columns["dateutc"]) == steps([5, 4, 3, 2])
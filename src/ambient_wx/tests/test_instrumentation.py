@@ -0,0 +1,103 @@
+import pytest
+import responses
+from urllib3.response import HTTPResponse
+
+from ambient_wx import instrumentation
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.api import ApiRequestError, LogRetry
+from ambient_wx.instrumentation import MetricsAggregator
+
+RECORDS = [
+    {"dateutc": 1515436500000, "date": "2018-01-08T18:35:00.000Z", "tempf": 66.9},
+    {"dateutc": 1515436200000, "date": "2018-01-08T18:30:00.000Z", "tempf": 66.5},
+]
+
+
+@pytest.fixture
+def events():
+    events = []
+    instrumentation.add_listener(events.append)
+    yield events
+    instrumentation.remove_listener(events.append)
+
+
+@pytest.fixture
+def metrics():
+    metrics = instrumentation.add_listener(MetricsAggregator())
+    yield metrics
+    instrumentation.remove_listener(metrics)
+
+
+class TestInstrumentation:
+
+    def test_no_listeners(self):
+        assert not instrumentation.enabled()
+        with instrumentation.timed("stage", stage="parse") as fields:
+            fields["rows"] = 1
+        instrumentation.emit("request")
+
+    def test_request_and_stage_events(self, events):
+        api = AmbientApi("123", "345", base_url="http://www.example.com", rate_limit=False)
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "http://www.example.com/v1/devices/123", json=RECORDS)
+            obs_coll = WxObservationCollection(api, mac_addr="123")
+            obs_coll.get_observations()
+        obs_coll.to_dataframe()
+        request, decode, parse, to_dataframe = events
+        assert request["event"] == "request"
+        assert request["endpoint"] == "devices/123"
+        assert request["status_code"] == 200
+        assert request["bytes"] > 0
+        assert request["retries"] == 0
+        assert request["duration"] >= 0
+        assert [decode["stage"], parse["stage"], to_dataframe["stage"]] == [
+            "decode",
+            "parse",
+            "to_dataframe",
+        ]
+        assert decode["rows"] == parse["rows"] == 2
+
+    def test_failed_request_event(self, events):
+        api = AmbientApi("123", "345", base_url="http://www.example.com", rate_limit=False)
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.GET, "http://www.example.com/v1/devices", status=401)
+            with pytest.raises(ApiRequestError):
+                WxObservationCollection(api, mac_addr="123").get(endpoint="devices")
+        assert events[0]["status_code"] == 401
+
+    def test_retry_event(self, events):
+        retry = LogRetry(total=3)
+        retry.increment(method="GET", url="/v1/devices", response=HTTPResponse(status=503))
+        assert events == [{"event": "retry", "status_code": 503, "retry_number": 1}]
+
+    def test_listener_errors_are_logged(self, events):
+        def broken(event):
+            raise RuntimeError("broken")
+
+        instrumentation.add_listener(broken)
+        try:
+            instrumentation.emit("stage", stage="parse", duration=0.1)
+        finally:
+            instrumentation.remove_listener(broken)
+        assert len(events) == 1
+
+
+class TestMetricsAggregator:
+
+    def test_prometheus_text(self, metrics):
+        instrumentation.emit("request", status_code=200, duration=0.2, bytes=100, retries=0)
+        instrumentation.emit("request", status_code=None, duration=3.0, bytes=None, retries=0)
+        instrumentation.emit("retry", status_code=429, retry_number=1)
+        instrumentation.emit("stage", stage="parse", duration=0.5, rows=288)
+        text = metrics.to_prometheus()
+        assert 'ambient_wx_requests_total{status="200"} 1' in text
+        assert 'ambient_wx_requests_total{status="error"} 1' in text
+        assert 'ambient_wx_request_duration_seconds_bucket{le="0.25"} 1' in text
+        assert 'ambient_wx_request_duration_seconds_bucket{le="+Inf"} 2' in text
+        assert "ambient_wx_request_duration_seconds_sum 3.2" in text
+        assert "ambient_wx_response_bytes_total 100" in text
+        assert 'ambient_wx_retries_total{status="429"} 1' in text
+        assert 'ambient_wx_stage_duration_seconds_sum{stage="parse"} 0.5' in text
+        assert 'ambient_wx_stage_rows_total{stage="parse"} 288' in text
+        metrics.reset()
+        assert "ambient_wx_requests_total{" not in metrics.to_prometheus()
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from ambient_wx.jsonstream import get_loads, iter_json_array
+
+
+def split(payload, size):
+    data = payload.encode()
+    return [data[index:][:size] for index in range(0, len(data), size)]
+
+
+class TestIterJsonArray:
+
+    def setup_method(self):
+        self.records = [
+            {"dateutc": 1515436500000 - index, "tz": "América/New_York", "tempf": 66.9 + index}
+            for index in range(25)
+        ]
+        self.payload = json.dumps(self.records, ensure_ascii=False)
+
+    @pytest.mark.parametrize("size", [1, 7, 64, 100000])
+    def test_batches_any_chunking(self, size):
+        batches = list(iter_json_array(split(self.payload, size), batch_size=10))
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert [record for batch in batches for record in batch] == self.records
+
+    def test_whitespace_and_empty(self):
+        assert list(iter_json_array([b"  [ ", b" ]  "])) == []
+        batches = list(iter_json_array([b'\n[\n  {"a": 1} ,\n  {"a": 2}\n]\n']))
+        assert batches == [[{"a": 1}, {"a": 2}]]
+
+    def test_invalid_payloads(self):
+        with pytest.raises(ValueError):
+            list(iter_json_array([b'{"a": 1}']))
+        with pytest.raises(ValueError):
+            list(iter_json_array([b'[{"a": 1}, {"a": ']))
+
+
+class TestGetLoads:
+
+    def test_backends(self):
+        assert get_loads()('[1]') == [1]
+        assert get_loads("json")('[1]') == [1]
+        with pytest.raises(ValueError):
+            get_loads("yaml")
+
+    def test_orjson(self):
+        pytest.importorskip("orjson")
+        assert get_loads("orjson")(b'[{"a": 1}]') == [{"a": 1}]
@@ -0,0 +1,89 @@
+import json
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.parallel import ParsePool, oldest_dateutc
+from ambient_wx.tests.helpers import LATEST, STEP, PagedGet
+
+
+def record(dateutc):
+    return {
+        "dateutc": dateutc,
+        "date": str(np.datetime64(dateutc, "ms")) + "Z",
+        "tempf": 50.0,
+        "humidity": 40,
+        "loc": "ambient-prod-2",
+    }
+
+
+@pytest.fixture(scope="module")
+def parse_pool():
+    with ParsePool(processes=2) as pool:
+        yield pool
+
+
+class TestParsePool:
+
+    def test_oldest_dateutc(self):
+        content = json.dumps([record(LATEST), record(LATEST - STEP)]).encode()
+        assert oldest_dateutc(content) == LATEST - STEP
+        assert oldest_dateutc(b"[]") is None
+
+    def test_parse(self, parse_pool):
+        content = json.dumps([record(LATEST - STEP * index) for index in range(5)]).encode()
+        frame = parse_pool.parse(content, start_ms=LATEST - STEP * 3, before_ms=LATEST)
+        assert list(frame.columns["dateutc"]) == [LATEST - STEP * index for index in (1, 2, 3)]
+        assert frame.columns["date"].dtype == np.dtype("datetime64[ms]")
+        assert list(frame.columns["loc"]) == ["ambient-prod-2"] * 3
+        assert frame.units["tempf"] == "degF"
+        assert len(parse_pool.parse(b"[]")) == 0
+
+    def test_fields_and_units(self):
+        content = json.dumps([record(LATEST)]).encode()
+        with ParsePool(processes=1, fields=["tempf"], units="SI") as pool:
+            frame = pool.parse(content)
+        assert frame.fields == ["dateutc", "date", "tempf"]
+        assert frame.units["tempf"] == "degC"
+        assert frame.columns["tempf"][0] == pytest.approx(10.0)
+
+
+class TestParallelBackfill:
+
+    def test_matches_serial_backfill(self, parse_pool):
+        api = AmbientApi("x", "y", rate_limit=False)
+        dateutcs = [LATEST - STEP * index for index in range(23)]
+        start = datetime.fromtimestamp((LATEST - STEP * 20) / 1000, tz=timezone.utc)
+        with patch("ambient_wx.api.ApiRequestHandler.get", side_effect=PagedGet(dateutcs, record)):
+            collection = WxObservationCollection(api, mac_addr="123")
+            collection.backfill(start, limit=5, parse_pool=parse_pool)
+            batches = list(
+                WxObservationCollection(api, mac_addr="123").iter_observations(
+                    start, limit=5, parse_pool=parse_pool
+                )
+            )
+        expected = dateutcs[:21]
+        assert list(collection.data.columns["dateutc"]) == expected
+        assert sum(len(batch) for batch in batches) == len(expected)
+        assert collection.data[0].tempf.magnitude == 50.0
+
+    @pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs /dev/shm")
+    def test_close_early_releases_shared_memory(self):
+        api = AmbientApi("x", "y", rate_limit=False)
+        dateutcs = [LATEST - STEP * index for index in range(23)]
+        start = datetime.fromtimestamp((LATEST - STEP * 20) / 1000, tz=timezone.utc)
+        before = set(os.listdir("/dev/shm"))
+        with ParsePool(processes=2) as pool:
+            with patch(
+                "ambient_wx.api.ApiRequestHandler.get", side_effect=PagedGet(dateutcs, record)
+            ):
+                batches = WxObservationCollection(api, mac_addr="123").iter_observations(
+                    start, limit=5, parse_pool=pool
+                )
+                assert len(next(batches))
+                batches.close()
+        assert set(os.listdir("/dev/shm")) - before == set()
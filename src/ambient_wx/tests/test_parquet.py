@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.parquet import from_arrow, read_parquet, to_arrow, write_parquet
+from ambient_wx.tests.helpers import HOUR, START, make_frame
+
+pa = pytest.importorskip("pyarrow")
+
+
+class TestArrow:
+
+    def test_round_trip_keeps_types_and_units(self):
+        frame = make_frame([START + HOUR, START], batt1=[1, None])
+        table = to_arrow(frame, mac_addr="AA")
+        assert table.schema.field("tempf").metadata == {b"unit": b"degF"}
+        assert table.schema.field("date").type == pa.timestamp("ms")
+        assert table.column("mac_addr").to_pylist() == ["AA", "AA"]
+        assert table.column("batt1").null_count == 1
+        result = from_arrow(table)
+        assert result.units == frame.units
+        assert "mac_addr" not in result.columns
+        assert result.columns["dateutc"].dtype == np.int64
+        assert result.columns["humidity"].dtype == np.float64
+        assert result[1].date == frame[1].date
+        assert result[1].tempf == frame[1].tempf
+        assert result[1].batt1 is None
+        assert result[0].tz == "America/New_York"
+
+
+class TestParquet:
+
+    def test_append_partition_and_range_read(self, tmp_path):
+        root = tmp_path / "archive"
+        write_parquet(make_frame([START + HOUR * hour for hour in range(0, 24)]), root, "AA")
+        write_parquet(make_frame([START + HOUR * hour for hour in range(24, 48)]), root, "AA")
+        write_parquet(make_frame([START]), root, "BB")
+        assert sorted(path.name for path in root.iterdir()) == ["mac_addr=AA", "mac_addr=BB"]
+        days = sorted(path.name for path in (root / "mac_addr=AA").iterdir())
+        assert days == ["day=2024-04-01", "day=2024-04-02"]
+
+        frame = read_parquet(root, mac_addr="AA")
+        assert len(frame) == 48
+        assert frame.columns["dateutc"][0] == START + HOUR * 47
+        assert frame.units["tempf"] == "degF"
+
+        frame = read_parquet(root, "AA", start_ms=START + HOUR * 20, end_ms=START + HOUR * 30)
+        assert len(frame) == 10
+        frame = read_parquet(root, "BB", columns=["tempf"])
+        assert list(frame.columns) == ["dateutc", "date", "tempf"]
+
+    def test_overlapping_writes_replace_rows(self, tmp_path):
+        root = tmp_path / "archive"
+        write_parquet(make_frame([START + HOUR * hour for hour in range(5)]), root, "AA")
+        write_parquet(make_frame([START + HOUR * 30]), root, "AA")
+        frame = make_frame([START + HOUR * hour for hour in range(3, 6)], tempf=[1.0, 2.0, 3.0])
+        write_parquet(frame, root, "AA")
+        frame = read_parquet(root, "AA")
+        assert len(frame) == 7
+        assert list(frame.columns["tempf"]) == [60.0, 3.0, 2.0, 1.0, 62.0, 61.0, 60.0]
+        assert len(list((root / "mac_addr=AA" / "day=2024-04-01").iterdir())) == 1
+
+    def test_new_fields_and_missing_station(self, tmp_path):
+        root = tmp_path / "archive"
+        write_parquet(make_frame([START + HOUR, START]), root, "AA")
+        frame = make_frame([START + HOUR * 2])
+        frame.columns["soilhum1"] = np.array([21.0])
+        write_parquet(frame, root, "AA")
+        frame = read_parquet(root, "AA")
+        assert len(frame) == 3
+        assert frame[0].soilhum1 == 21.0
+        assert frame[1].soilhum1 is None
+        assert len(read_parquet(root, "CC")) == 0
+
+    def test_collection(self, tmp_path):
+        api = AmbientApi("123", "345", rate_limit=False)
+        obs_coll = WxObservationCollection(api, mac_addr="AA")
+        obs_coll.data = make_frame([START + HOUR, START])
+        assert obs_coll.to_arrow().num_rows == 2
+        obs_coll.write_parquet(tmp_path)
+        obs_coll.load_parquet(tmp_path, start=datetime(2024, 4, 1, 0, 30))
+        assert len(obs_coll.data) == 1
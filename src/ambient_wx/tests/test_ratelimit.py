@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from ambient_wx.ratelimit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket:
+
+    def test_reserve_paces_requests(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5
+        assert bucket.reserve() == 1.0
+        clock.now = 5
+        assert bucket.reserve() == 0
+
+
+class TestRateLimiter:
+
+    def test_acquire_waits_for_slowest_bucket(self):
+        clock = FakeClock()
+        limiter = RateLimiter("api-key-acquire", "app-key-acquire", clock=clock, sleep=clock.sleep)
+        waits = [limiter.acquire() for _ in range(4)]
+        assert waits == [0, 1.0, 1.0, 1.0]
+        assert clock.now == 3.0
+        stats = limiter.stats
+        assert stats["requests"] == 4
+        assert stats["queue_depth"] == 0
+        assert stats["max_wait"] == 1.0
+        assert stats["mean_wait"] == 0.75
+
+    def test_application_key_shared_between_api_keys(self):
+        clock = FakeClock()
+        first = RateLimiter("api-key-1", "app-key-shared", clock=clock, sleep=clock.sleep)
+        second = RateLimiter("api-key-2", "app-key-shared", clock=clock, sleep=clock.sleep)
+        assert first.buckets[1] is second.buckets[1]
+        assert first.buckets[0] is not second.buckets[0]
+
+    def test_for_credentials_returns_shared_limiter(self):
+        limiters = []
+
+        def target():
+            limiters.append(RateLimiter.for_credentials("api-key-threads", "app-key-threads"))
+
+        threads = [threading.Thread(target=target) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(limiter is limiters[0] for limiter in limiters)
+        assert RateLimiter.for_credentials("api-key-threads", "other") is not limiters[0]
+
+    def test_conflicting_bucket_settings(self):
+        clock = FakeClock()
+        limiter = RateLimiter("api-key-conflict", "app-key-conflict", clock=clock)
+        same = RateLimiter("api-key-conflict", "app-key-conflict", api_key_rate=1, clock=clock)
+        assert same.buckets[0] is limiter.buckets[0]
+        with pytest.raises(ValueError):
+            RateLimiter("api-key-conflict", "app-key-conflict", api_key_rate=5, clock=clock)
+        with pytest.raises(ValueError):
+            RateLimiter("api-key-conflict", "app-key-conflict", clock=FakeClock())
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from ambient_wx.ambient_wx import AmbientApi, WxDevice
+from ambient_wx.realtime import WxRealtimeClient, decode_payload, encode_payload
+
+HANDSHAKE = '0{"sid":"%s","pingInterval":200,"pingTimeout":1000,"upgrades":[]}'
+
+
+def data_event(mac_addr, dateutc):
+    record = {
+        "macAddress": mac_addr,
+        "dateutc": dateutc,
+        "date": "2018-01-08T18:35:00.000Z",
+        "tempf": 66.9,
+    }
+    return "42" + json.dumps(["data", record])
+
+
+class StubRealtimeHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, packets):
+        payload = encode_payload(packets).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        params = parse_qs(urlparse(self.path).query)
+        if "sid" not in params:
+            server.connections += 1
+            server.sid = f"sid{server.connections}"
+            self.respond([HANDSHAKE % server.sid, "40"])
+            return
+        if params["sid"][0] != server.sid:
+            self.respond(["1"])
+            return
+        try:
+            packets = [server.outbox.get(timeout=1)]
+        except queue.Empty:
+            packets = ["6"]
+        while not server.outbox.empty():
+            packets.append(server.outbox.get())
+        self.respond(packets)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        for packet in decode_payload(body):
+            server.received.append(packet)
+            if packet.startswith("42"):
+                event, payload = json.loads(packet[2:])
+                server.subscribed_keys = payload["apiKeys"]
+                server.outbox.put(
+                    "42" + json.dumps(["subscribed", {"devices": [{"macAddress": "AA"}]}])
+                )
+                for packet in server.script.pop(0) if server.script else []:
+                    server.outbox.put(packet)
+            elif packet == "2":
+                server.outbox.put("3")
+            elif packet == "1":
+                server.outbox.put("1")
+        self.respond(["ok"])
+
+
+@pytest.fixture
+def realtime_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRealtimeHandler)
+    server.connections = 0
+    server.sid = None
+    server.outbox = queue.Queue()
+    server.received = []
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def realtime_client(realtime_server):
+    host, port = realtime_server.server_address
+    with AmbientApi("key1", "app1", rate_limit=False) as api:
+        yield WxRealtimeClient(api, url=f"http://{host}:{port}", backoff_factor=0.01)
+
+
+def test_payload_round_trip():
+    packets = ['0{"sid":"abc"}', "40", '42["data",{"tempf":"é"}]']
+    assert decode_payload(encode_payload(packets)) == packets
+
+
+class TestWxRealtimeClient:
+
+    def run_until(self, client, batches, count):
+        def callback(batch):
+            batches.append(batch)
+            if sum(len(batch) for batch in batches) >= count:
+                client.stop()
+
+        client.on_data(callback)
+        thread = threading.Thread(target=client.run)
+        thread.start()
+        thread.join(10)
+        assert not thread.is_alive()
+
+    def test_subscribe_and_receive(self, realtime_server, realtime_client):
+        realtime_server.script = [[data_event("AA", 1), data_event("BB", 2)]]
+        batches = []
+        self.run_until(realtime_client, batches, 2)
+        assert realtime_server.subscribed_keys == ["key1"]
+        assert realtime_client.subscribed == ["AA"]
+        devices = [device for batch in batches for device in batch]
+        assert [device.mac_addr for device in devices] == ["AA", "BB"]
+        assert isinstance(devices[0], WxDevice)
+        assert devices[0].data.tempf.magnitude == 66.9
+
+    def test_reconnects_after_close(self, realtime_server, realtime_client):
+        realtime_server.script = [["1"], [data_event("AA", 3)]]
+        batches = []
+        self.run_until(realtime_client, batches, 1)
+        assert realtime_server.connections == 2
+        assert batches[0][0].data.dateutc == 3
+
+    def test_batches_updates(self, realtime_server, realtime_client):
+        realtime_server.script = [[data_event("AA", 1), data_event("BB", 2), data_event("CC", 3)]]
+        realtime_client.batch_interval = 0.3
+        batches = []
+        self.run_until(realtime_client, batches, 3)
+        assert [len(batch) for batch in batches] == [3]
+
+    def test_failing_callback_is_logged(self, realtime_server, realtime_client, caplog):
+        realtime_server.script = [[data_event("AA", 1), data_event("BB", 2)]]
+
+        @realtime_client.on_data
+        def failing(batch):
+            raise RuntimeError("callback failed")
+
+        batches = []
+        self.run_until(realtime_client, batches, 2)
+        assert [device.mac_addr for batch in batches for device in batch] == ["AA", "BB"]
+        assert realtime_server.connections == 1
+        assert "Realtime callback" in caplog.text
+
+    def test_sends_pings(self, realtime_server, realtime_client):
+        realtime_server.script = [[]]
+        thread = threading.Thread(target=realtime_client.run)
+        thread.start()
+        threading.Event().wait(0.7)
+        realtime_client.stop()
+        thread.join(10)
+        assert "2" in realtime_server.received
+
+    def test_stream(self, realtime_server, realtime_client):
+        realtime_server.script = [[data_event("AA", 1)]]
+
+        async def first_batch():
+            stream = realtime_client.stream()
+            batch = await stream.__anext__()
+            await stream.aclose()
+            return batch
+
+        batch = asyncio.run(first_batch())
+        assert batch[0].mac_addr == "AA"
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from ambient_wx.ambient_wx import AmbientApi, WxObservationCollection
+from ambient_wx.rollup import WxRollup
+from ambient_wx.tests.helpers import HOUR, START, make_frame
+
+QUARTER = HOUR // 4
+
+
+def rollup_frame(indexes, rain=None):
+    indexes = list(indexes)[::-1]
+    return make_frame(
+        [START + QUARTER * index for index in indexes],
+        tempf=[60.0 + index for index in indexes],
+        winddir=[350 if index % 2 else 10 for index in indexes],
+        windgustmph=[float(index) for index in indexes],
+        dailyrainin=[rain[index] if rain else 0.0 for index in indexes],
+    )
+
+
+class TestWxRollup:
+
+    def test_reducers(self):
+        rollup = WxRollup("hour")
+        rain = [0.0, 0.1, 0.1, 0.3, 0.4, 0.05, 0.05, 0.1]
+        affected = rollup.update(rollup_frame(range(8), rain=rain))
+        assert affected == {START, START + HOUR}
+        frame = rollup.to_frame()
+        assert list(frame.columns["dateutc"]) == [START + HOUR, START]
+        assert list(frame.columns["count"]) == [4, 4]
+        assert list(frame.columns["tempf_min"]) == [64.0, 60.0]
+        assert list(frame.columns["tempf_mean"]) == [65.5, 61.5]
+        assert list(frame.columns["windgustmph_max"]) == [7.0, 3.0]
+        assert "windgustmph_min" not in frame.columns
+        assert frame.columns["winddir_mean"] == pytest.approx([0, 0], abs=1e-9)
+        assert frame.columns["rain_sum"] == pytest.approx([0.2, 0.3])
+        assert frame.units["tempf_mean"] == "degF"
+        assert frame.units["rain_sum"] == "inches"
+
+    def test_incremental_updates_match_full_rollup(self):
+        rain = [0.0, 0.1, 0.1, 0.3, 0.4, 0.05, 0.05, 0.1]
+        full = WxRollup("hour")
+        full.update(rollup_frame(range(8), rain=rain))
+        rollup = WxRollup("hour")
+        rollup.update(rollup_frame(range(4, 8), rain=rain))
+        affected = rollup.update(rollup_frame(range(0, 5), rain=rain))
+        assert affected == {START, START + HOUR}
+        assert rollup.update(rollup_frame(range(2, 6), rain=rain)) == set()
+        for name, column in full.to_frame().columns.items():
+            assert rollup.to_frame().columns[name] == pytest.approx(column)
+
+    def test_save_and_load(self, tmp_path):
+        rollup = WxRollup("day")
+        rollup.update(rollup_frame(range(4)))
+        rollup.save(tmp_path / "rollup.json")
+        loaded = WxRollup.load(tmp_path / "rollup.json")
+        assert loaded.freq == "day"
+        assert loaded.update(rollup_frame(range(4))) == set()
+        assert loaded.update(rollup_frame(range(6))) == {START}
+        assert list(loaded.to_frame().columns["count"]) == [6]
+        assert np.isnan(WxRollup("hour").rain_sum(START))
+
+    def test_closed_buckets_are_compact(self, tmp_path):
+        rain = [0.0, 0.1, 0.1, 0.3, 0.4, 0.05, 0.05, 0.1] * 6
+        full = WxRollup("hour", open_buckets=100)
+        full.update(rollup_frame(range(48), rain=rain))
+        rollup = WxRollup("hour")
+        for stop in range(48, 0, -5):
+            rollup.update(rollup_frame(range(max(stop - 5, 0), stop), rain=rain))
+        assert [key for key, bucket in rollup.buckets.items() if "seen" in bucket] == [
+            START + HOUR * 10,
+            START + HOUR * 11,
+        ]
+        assert rollup.update(rollup_frame(range(20, 30), rain=rain)) == set()
+        for name, column in full.to_frame().columns.items():
+            assert rollup.to_frame().columns[name] == pytest.approx(column)
+        rollup.save(tmp_path / "rollup.json")
+        loaded = WxRollup.load(tmp_path / "rollup.json")
+        assert "seen" not in loaded.buckets[START]
+        assert loaded.update(rollup_frame(range(40, 52), rain=rain * 2)) == {
+            START + HOUR * 12,
+        }
+        assert list(loaded.to_frame().columns["count"]) == [4] * 13
+
+    def test_closed_buckets_accept_gap_fills(self, tmp_path):
+        rain = [0.0, 0.1, 0.2, 0.4, 0.0, 0.0, 0.0, 0.0, 0.5, 0.5, 0.6, 0.6]
+        indexes = [0, 1, 2, 3, 8, 9, 10, 11]
+        full = WxRollup("hour")
+        full.update(rollup_frame(indexes, rain=rain))
+        rollup = WxRollup("hour")
+        rollup.update(rollup_frame([0, 3, 8, 9, 10, 11], rain=rain))
+        assert "seen" not in rollup.buckets[START]
+        rollup.save(tmp_path / "rollup.json")
+        rollup = WxRollup.load(tmp_path / "rollup.json")
+        assert rollup.update(rollup_frame([1, 2], rain=rain)) == {START}
+        assert rollup.update(rollup_frame([0, 1, 2, 3], rain=rain)) == set()
+        assert list(rollup.to_frame().columns["count"]) == [4, 4]
+        for name, column in full.to_frame().columns.items():
+            assert rollup.to_frame().columns[name] == pytest.approx(column)
+
+    def test_unknown_frequency(self):
+        with pytest.raises(ValueError):
+            WxRollup("minute")
+
+    def test_collection_rollup(self, tmp_path):
+        api = AmbientApi(api_key="x", application_key="y", rate_limit=False)
+        collection = WxObservationCollection(api, mac_addr="00:00:00:00:00:00")
+        collection.data = rollup_frame(range(3))
+        path = tmp_path / "hourly.json"
+        collection.rollup("hour", path=path)
+        collection.data = rollup_frame(range(3, 6))
+        rollup = collection.rollup("hour", path=path)
+        assert list(rollup.to_frame().columns["count"]) == [2, 4]
+        with pytest.raises(ValueError):
+            collection.rollup("day", path=path)
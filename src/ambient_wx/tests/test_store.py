@@ -0,0 +1,35 @@
+import pytest
+
+from ambient_wx.store import WxObservationStore
+from ambient_wx.tests.helpers import make_frame
+
+
+@pytest.fixture
+def store(tmp_path):
+    with WxObservationStore(tmp_path / "observations.db") as store:
+        yield store
+
+
+class TestWxObservationStore:
+
+    def test_empty_store(self, store):
+        assert store.last_dateutc("AA") is None
+        assert store.latest("AA", count=2) == []
+        assert len(store.read("AA")) == 0
+
+    def test_write_and_read(self, store):
+        assert store.write("AA", make_frame([3000, 2000, 1000], tempf=66.9, batt1=1)) == 3
+        assert store.write("BB", make_frame([5000])) == 1
+        assert store.last_dateutc("AA") == 3000
+        assert store.latest("AA", count=2) == [3000, 2000]
+        frame = store.read("AA")
+        assert list(frame.columns["dateutc"]) == [3000, 2000, 1000]
+        assert frame[0].tempf.magnitude == 66.9
+        assert frame[0].batt1 == 1
+        frame = store.read("AA", start_ms=2000, end_ms=3000)
+        assert list(frame.columns["dateutc"]) == [2000]
+
+    def test_write_replaces_duplicates(self, store):
+        store.write("AA", make_frame([2000, 1000]))
+        store.write("AA", make_frame([3000, 2000]))
+        assert list(store.read("AA").columns["dateutc"]) == [3000, 2000, 1000]
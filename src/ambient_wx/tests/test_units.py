@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import ambient_wx
+from ambient_wx import units
+from ambient_wx.ambient_wx import WxObservation
+
+
+class TestUnits:
+
+    def test_registry_is_shared(self):
+        assert units.ureg is units.get_registry()
+        assert units.Q_ is units.ureg.Quantity
+        assert WxObservation.ureg is units.ureg
+        assert WxObservation.Q_ is units.Q_
+
+    def test_import_does_not_load_pandas_or_pint(self):
+        code = (
+            "import sys\n"
+            "import ambient_wx\n"
+            "from ambient_wx.frame import WxObservationFrame\n"
+            "frame = WxObservationFrame.from_records(\n"
+            "    [{'dateutc': 1515436500000, 'date': '2018-01-08T18:35:00.000Z', 'tempf': 66.9}]\n"
+            ")\n"
+            "frame[0].dateutc\n"
+            "print('pandas' in sys.modules, 'pint' in sys.modules)\n"
+        )
+        src = os.path.dirname(os.path.dirname(ambient_wx.__file__))
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=dict(os.environ, PYTHONPATH=src),
+        )
+        assert result.stdout.split() == ["False", "False"]
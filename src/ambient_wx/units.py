@@ -0,0 +1,91 @@
+import threading
+
+FIELD_UNITS = {
+    "windspeedmph": "mph",
+    "windgustmph": "mph",
+    "maxdailygust": "mph",
+    "tempf": "degF",
+    "baromrelin": "inHg",
+    "baromabsin": "inHg",
+    "tempinf": "degF",
+    "hourlyrainin": "inches",
+    "dailyrainin": "inches",
+    "monthlyrainin": "inches",
+    "yearlyrainin": "inches",
+    "feelsLike": "degF",
+    "dewPoint": "degF",
+    "winddir": "degrees",
+    "winddir_avg10m": "degrees",
+    "humidity": "percent",
+    "humidityin": "percent",
+}
+
+UNIT_SYSTEMS = {
+    "SI": ["degC", "meter / second", "hectopascal", "millimeter"],
+    "US": ["degF", "mph", "inHg", "inches"],
+}
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from pint import UnitRegistry
+
+                _registry = UnitRegistry()
+    return _registry
+
+
+def __getattr__(name):
+    if name == "ureg":
+        return get_registry()
+    if name == "Q_":
+        return get_registry().Quantity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def system_units(field_units, system):
+    try:
+        targets = UNIT_SYSTEMS[system]
+    except KeyError:
+        raise ValueError(f"Unknown unit system {system}, use one of {list(UNIT_SYSTEMS)}")
+    ureg = get_registry()
+    conversions = {}
+    for field, unit in field_units.items():
+        dimensionality = ureg.get_dimensionality(unit)
+        for target in targets:
+            if ureg.get_dimensionality(target) == dimensionality:
+                conversions[field] = target
+                break
+    return conversions
+
+
+class LazyRegistryAttribute:
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return __getattr__(self.name)
+
+
+class QuantityField:
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = f"_{name}"
+        self.unit = FIELD_UNITS[name]
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = get_registry().Quantity(value, self.unit)
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)